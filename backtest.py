@@ -0,0 +1,216 @@
+"""Backtests the strategy model on cached races: practice degradation in, predicted vs actual race out.
+
+For every race in the lap store that also has practice laps stored, the
+degradation is fitted on each practice session separately (lap numbers, and so
+the fuel correction, restart in every session) and combined per compound
+weighted by the laps behind each fit. The best one- and two-stop
+plans are found with find_best_one_stop/find_best_two_stop, and the prediction is
+compared with the winner's actual strategy and race time. Nothing is fetched, so
+a backtest only covers what has been ingested.
+
+Example:
+    python backtest.py --year 2023 --workers 4 --output backtest_2023.csv
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from field_simulation import session_strategies
+from lap_store import DEFAULT_STORE_DIR, LapStore, event_key
+from strategy_core.degradation_fit import clean_stint_laps, fit_groups
+from strategy_core.strategy_search import DRY_COMPOUNDS, compound_sequences, find_best_one_stop, find_best_two_stop
+
+# Sessions the degradation is fitted on, whichever of them are cached
+PRACTICE_SESSIONS = ('FP1', 'FP2', 'FP3')
+# Races backtested by a worker process before it is replaced, which caps memory growth
+TASKS_PER_WORKER = 4
+
+
+def cached_races(store, years=None, practice_sessions=PRACTICE_SESSIONS):
+    """(year, event) of every stored race that has at least one practice session stored too.
+
+    Sessions are paired by event_key, so a race stored as 'Bahrain' finds practice
+    ingested as 'Bahrain Grand Prix'; the race's own event name is returned.
+    """
+    sessions = store.sessions()
+    stored = {(year, event_key(event), session) for year, event, session in sessions}
+    return sorted({
+        (year, event) for year, event, session in sessions
+        if session == 'R' and (years is None or year in years)
+        and any((year, event_key(event), practice) in stored for practice in practice_sessions)
+    })
+
+
+def race_result(race_laps):
+    """Winner, race time (s), compound order and pit laps of the first driver to finish the last lap.
+
+    Ranks on the session time at the end of the last lap, which a missing lap
+    time elsewhere in the race does not affect.
+    """
+    if 'Time' not in race_laps.columns:
+        raise ValueError("Race laps have no session times; ingest the session again")
+    total_laps = int(race_laps['LapNumber'].max())
+    final_laps = race_laps.loc[(race_laps['LapNumber'] == total_laps) & race_laps['Time'].notna()]
+    if final_laps.empty:
+        raise ValueError("No driver has a session time for the last lap")
+    winner_lap = final_laps.loc[final_laps['Time'].idxmin()]
+    # The race starts where the first laps began: their end time less their lap time
+    first_laps = race_laps.loc[race_laps['LapNumber'] == 1]
+    race_start = (first_laps['Time'] - first_laps['LapTime']).min()
+    if pd.isna(race_start):
+        raise ValueError("No first lap has both a session time and a lap time")
+    winner = winner_lap['Driver']
+    _, strategies = session_strategies(race_laps.loc[race_laps['Driver'] == winner], total_laps)
+    return winner, (winner_lap['Time'] - race_start).total_seconds(), '-'.join(strategies.sequence(0)), strategies.pit_laps(0)
+
+
+def practice_degradation(session_laps, fuel_effect_per_lap=0.04):
+    """Per-compound degradation and base lap time from practice sessions fitted one at a time.
+
+    Each session is fitted on its own, since the fuel correction counts laps from
+    the start of that session; the per-compound slope is the mean over every
+    session's stint fits, weighted by the laps behind each fit.
+    """
+    fits = [fit_groups(clean_stint_laps(laps, fuel_effect_per_lap)) for laps in session_laps]
+    fits = pd.concat(fits, ignore_index=True)
+    fits = fits.loc[np.isfinite(fits['Degradation'])]
+    if fits.empty:
+        raise ValueError("No reliable practice stints")
+    weighted = fits.assign(Weighted=fits['Degradation'] * fits['Laps']).groupby('Compound', sort=False)[['Weighted', 'Laps']].sum()
+    degradation_summary = (weighted['Weighted'] / weighted['Laps']).rename('Degradation').reset_index()
+    return degradation_summary, float(fits['Intercept'].median())
+
+
+def predict_race(degradation_summary, total_laps, base_lap_time, fuel_effect_per_lap, pit_stop_time_loss):
+    """Fastest one- or two-stop plan over every compound order the app compares."""
+    compounds = [c for c in DRY_COMPOUNDS if c in set(degradation_summary['Compound'])]
+    results = [find_best_one_stop(list(sequence), total_laps, degradation_summary, base_lap_time, fuel_effect_per_lap, pit_stop_time_loss)
+               for sequence in compound_sequences(compounds, 1)]
+    results += [find_best_two_stop(list(sequence), total_laps, degradation_summary, base_lap_time, fuel_effect_per_lap, pit_stop_time_loss)
+                for sequence in compound_sequences(compounds, 2)]
+    results = [r for r in results if r is not None]
+    if not results:
+        raise ValueError("Fewer than two dry compounds have practice degradation data")
+    return min(results, key=lambda r: r['Total Time (s)'])
+
+
+def backtest_race(year, event, store_dir=DEFAULT_STORE_DIR, practice_sessions=PRACTICE_SESSIONS,
+                  pit_stop_time_loss=22.0, fuel_effect_per_lap=0.04, base_lap_time=None):
+    """Worker: predicts one race from its cached practice laps and scores the prediction; returns one row.
+
+    base_lap_time defaults to the median fuel-corrected practice pace on new tyres
+    over every session's stint fits.
+    """
+    start = time.perf_counter()
+    store = LapStore(store_dir)
+    sessions = [s for s in practice_sessions if store.has(year, event, s)]
+    if not sessions:
+        raise ValueError("No practice sessions cached")
+    race_laps = store.read(year, event, 'R')
+    total_laps = int(race_laps['LapNumber'].max())
+
+    degradation_summary, practice_base_lap_time = practice_degradation(
+        [store.read(year, event, s) for s in sessions], fuel_effect_per_lap)
+    if base_lap_time is None:
+        base_lap_time = practice_base_lap_time
+    prediction = predict_race(degradation_summary, total_laps, base_lap_time, fuel_effect_per_lap, pit_stop_time_loss)
+    predicted_pit_laps = [int(prediction[c]) for c in ('Pit Lap 1', 'Pit Lap 2') if pd.notna(prediction.get(c))]
+
+    winner, actual_time, actual_strategy, actual_pit_laps = race_result(race_laps)
+    return {
+        'Year': year, 'Event': event, 'Status': 'ok',
+        'Practice': '+'.join(sessions),
+        'Total Laps': total_laps,
+        'Predicted Strategy': prediction['Strategy'],
+        'Predicted Pit Laps': ', '.join(str(lap) for lap in predicted_pit_laps),
+        'Predicted Time (s)': float(prediction['Total Time (s)']),
+        'Winner': winner,
+        'Actual Strategy': actual_strategy,
+        'Actual Pit Laps': ', '.join(str(lap) for lap in actual_pit_laps),
+        'Actual Time (s)': actual_time,
+        'Error (s)': float(prediction['Total Time (s)']) - actual_time,
+        'Strategy Match': prediction['Strategy'] == actual_strategy,
+        'Stops Match': len(predicted_pit_laps) == len(actual_pit_laps),
+        'Runtime (s)': time.perf_counter() - start
+    }
+
+
+def run_backtest(races, store_dir=DEFAULT_STORE_DIR, workers=4, practice_sessions=PRACTICE_SESSIONS,
+                 pit_stop_time_loss=22.0, fuel_effect_per_lap=0.04, base_lap_time=None, tasks_per_worker=TASKS_PER_WORKER):
+    """Backtests every (year, event) in a process pool; returns one row per race in the given order."""
+    rows = {}
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=tasks_per_worker) as pool:
+        futures = {
+            pool.submit(backtest_race, year, event, store_dir, practice_sessions, pit_stop_time_loss, fuel_effect_per_lap, base_lap_time): (year, event)
+            for year, event in races
+        }
+        for future in as_completed(futures):
+            year, event = futures[future]
+            try:
+                rows[year, event] = future.result()
+            except Exception as e:
+                # A race without usable practice data should not stop the backtest
+                rows[year, event] = {'Year': year, 'Event': event, 'Status': f'failed: {e}'}
+            print(f"{year} {event}: {rows[year, event]['Status']}")
+    return pd.DataFrame([rows[race] for race in races])
+
+
+def error_statistics(results):
+    """Race-time error and strategy hit rates over the races that were backtested successfully."""
+    scored = results.loc[results['Status'] == 'ok']
+    errors = scored['Error (s)'].to_numpy(dtype=float)
+    if not len(errors):
+        return pd.Series({'Races': 0}, dtype=float)
+    return pd.Series({
+        'Races': len(errors),
+        'Mean Error (s)': errors.mean(),
+        'Mean Absolute Error (s)': np.abs(errors).mean(),
+        'Median Absolute Error (s)': np.median(np.abs(errors)),
+        'RMSE (s)': np.sqrt((errors ** 2).mean()),
+        'Max Absolute Error (s)': np.abs(errors).max(),
+        'Within 2 s': (np.abs(errors) <= 2).mean(),
+        'Strategy Match Rate': scored['Strategy Match'].mean(),
+        'Stop Count Match Rate': scored['Stops Match'].mean(),
+        'Mean Runtime (s)': scored['Runtime (s)'].mean()
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest predicted strategies against cached race results.")
+    parser.add_argument('--year', type=int, nargs='+', help="Seasons to backtest (default: every cached race)")
+    parser.add_argument('--events', nargs='+', help="Only these events")
+    parser.add_argument('--practice', nargs='+', default=list(PRACTICE_SESSIONS), help="Sessions to fit degradation on")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help="Lap store directory")
+    parser.add_argument('--workers', type=int, default=4, help="Number of races backtested in parallel")
+    parser.add_argument('--pit-loss', type=float, default=22.0, help="Pit stop time loss (s)")
+    parser.add_argument('--fuel', type=float, default=0.04, help="Fuel effect (s/lap)")
+    parser.add_argument('--base-lap-time', type=float, help="Fixed base lap time (default: from practice)")
+    parser.add_argument('--output', help="Per-race results table (.csv or .parquet)")
+    args = parser.parse_args(argv)
+
+    races = cached_races(LapStore(args.store), args.year, args.practice)
+    if args.events:
+        wanted = {event_key(event) for event in args.events}
+        races = [(year, event) for year, event in races if event_key(event) in wanted]
+    if not races:
+        parser.error("no cached race with practice laps matches")
+
+    start = time.perf_counter()
+    results = run_backtest(races, args.store, args.workers, tuple(args.practice), args.pit_loss, args.fuel, args.base_lap_time)
+    if args.output and args.output.endswith('.parquet'):
+        results.to_parquet(args.output, index=False)
+    elif args.output:
+        results.to_csv(args.output, index=False)
+
+    scored = results.loc[results['Status'] == 'ok']
+    if not scored.empty:
+        print(scored[['Year', 'Event', 'Predicted Strategy', 'Actual Strategy', 'Error (s)', 'Runtime (s)']].to_string(index=False))
+    print(error_statistics(results).to_string())
+    print(f"Backtested {len(scored)} of {len(results)} race(s) in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Offline benchmark of the strategy pipeline on synthetic sessions.
+
+Example:
+    python benchmark.py --drivers 10 20 40 --laps 57 --output bench_results.json
+"""
+import argparse
+import itertools
+import json
+import platform
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from strategy_core.degradation_fit import calculate_degradation, fit_degradation_batch
+from strategy_core.stint_engine import StintEngine
+from strategy_core.strategy_search import (
+    DRY_COMPOUNDS, find_best_one_stop, find_best_two_stop, optimize_strategy, simulate_stint, top_k_strategies
+)
+
+# True degradation (s/lap) used to generate synthetic laps
+SYNTHETIC_RATES = {'SOFT': 0.12, 'MEDIUM': 0.07, 'HARD': 0.04}
+BASE_LAP_TIME = 99.5
+FUEL_EFFECT_PER_LAP = 0.04
+PIT_STOP_TIME_LOSS = 22.0
+
+
+def make_synthetic_laps(n_drivers=20, total_laps=57, compounds=DRY_COMPOUNDS, noise=0.3, outlier_rate=0.02, seed=0):
+    """Generates a laps table with the same columns as fastf1's session.laps.
+
+    Every driver runs a random one- or two-stop plan on the given compounds, with
+    a per-driver pace offset, Gaussian lap-time noise and occasional slow laps
+    (traffic, yellow flags) that the 107% rule should remove.
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for driver_number in range(1, n_drivers + 1):
+        driver = f"D{driver_number:02d}"
+        # Session time at the end of each lap, counted from a race start one hour in
+        session_time = 3600.0
+        pace_offset = rng.normal(0, 0.5)
+        num_stops = rng.integers(1, 3)
+        pit_laps = np.sort(rng.choice(np.arange(12, total_laps - 11), size=num_stops, replace=False))
+        stint_compounds = rng.choice(compounds, size=num_stops + 1)
+        stint_bounds = np.concatenate([[0], pit_laps, [total_laps]])
+        for stint, compound in enumerate(stint_compounds):
+            for lap_number in range(stint_bounds[stint] + 1, stint_bounds[stint + 1] + 1):
+                tyre_life = lap_number - stint_bounds[stint]
+                lap_time = (
+                    BASE_LAP_TIME + pace_offset
+                    + SYNTHETIC_RATES.get(compound, 0.05) * tyre_life
+                    - FUEL_EFFECT_PER_LAP * lap_number
+                    + rng.normal(0, noise)
+                )
+                if rng.random() < outlier_rate:
+                    lap_time += rng.uniform(10, 30)
+                session_time += lap_time
+                rows.append({
+                    'Driver': driver,
+                    'DriverNumber': str(driver_number),
+                    'LapNumber': float(lap_number),
+                    'LapTime': pd.Timedelta(seconds=lap_time),
+                    'Compound': compound,
+                    'TyreLife': float(tyre_life),
+                    'Stint': float(stint + 1),
+                    'PitInTime': pd.Timedelta(seconds=lap_number * 100) if lap_number == stint_bounds[stint + 1] and stint < num_stops else pd.NaT,
+                    'PitOutTime': pd.Timedelta(seconds=lap_number * 100) if tyre_life == 1 and stint > 0 else pd.NaT,
+                    'Time': pd.Timedelta(seconds=session_time)
+                })
+    return pd.DataFrame(rows)
+
+
+def time_call(func, repeat=3):
+    """Best wall time of several calls, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def degradation_loop(laps, fuel_effect_per_lap):
+    """The app's original driver x compound calculate_degradation loop."""
+    reliable_stints = []
+    for driver in laps['Driver'].unique():
+        for compound in laps['Compound'].unique():
+            degradation = calculate_degradation(laps, driver, compound, fuel_effect_per_lap)
+            if degradation is not None:
+                reliable_stints.append({'Driver': driver, 'Compound': compound, 'Degradation': degradation})
+    return pd.DataFrame(reliable_stints)
+
+
+def benchmark_scale_point(n_drivers, total_laps, compounds=DRY_COMPOUNDS, noise=0.3, repeat=3, seed=0):
+    """Times every pipeline stage on one synthetic session; returns one row per stage."""
+    laps = make_synthetic_laps(n_drivers, total_laps, compounds, noise, seed=seed)
+    summary = fit_degradation_batch(laps, FUEL_EFFECT_PER_LAP).groupby('Compound')['Degradation'].mean().reset_index()
+    engine = StintEngine(summary, BASE_LAP_TIME, FUEL_EFFECT_PER_LAP)
+    one_stop_combinations = [combo for combo in itertools.permutations(compounds, 2)]
+    two_stop_combinations = [combo for combo in itertools.product(compounds, repeat=3) if len(set(combo)) >= 2]
+    search_args = (total_laps, summary, BASE_LAP_TIME, FUEL_EFFECT_PER_LAP, PIT_STOP_TIME_LOSS)
+
+    stages = {
+        'calculate_degradation (loop)': lambda: degradation_loop(laps, FUEL_EFFECT_PER_LAP),
+        'fit_degradation_batch': lambda: fit_degradation_batch(laps, FUEL_EFFECT_PER_LAP),
+        'simulate_stint x1000': lambda: [simulate_stint(1, 20, 'SOFT', summary, BASE_LAP_TIME, FUEL_EFFECT_PER_LAP) for _ in range(1000)],
+        'StintEngine.stint_time x1000': lambda: [engine.stint_time(1, 20, 'SOFT') for _ in range(1000)],
+        'find_best_one_stop (loop, all combos)': lambda: [find_best_one_stop(list(c), *search_args, vectorized=False) for c in one_stop_combinations],
+        'find_best_one_stop (vectorized, all combos)': lambda: [find_best_one_stop(list(c), *search_args) for c in one_stop_combinations],
+        'find_best_two_stop (loop, all combos)': lambda: [find_best_two_stop(list(c), *search_args, vectorized=False) for c in two_stop_combinations],
+        'find_best_two_stop (vectorized, all combos)': lambda: [find_best_two_stop(list(c), *search_args) for c in two_stop_combinations],
+        'optimize_strategy (max 3 stops)': lambda: optimize_strategy(engine, total_laps, PIT_STOP_TIME_LOSS, max_stops=3),
+        'top_k_strategies (k=10)': lambda: top_k_strategies(engine, total_laps, PIT_STOP_TIME_LOSS, k=10, compounds=compounds)
+    }
+
+    results = []
+    for stage, func in stages.items():
+        seconds = time_call(func, repeat)
+        results.append({
+            'stage': stage, 'drivers': n_drivers, 'laps': total_laps, 'session_laps': len(laps),
+            'seconds': seconds, 'repeat': repeat
+        })
+        print(f"{n_drivers:>3} drivers {total_laps:>3} laps  {stage:<45} {seconds * 1000:10.2f} ms")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the strategy pipeline on synthetic sessions.")
+    parser.add_argument('--drivers', type=int, nargs='+', default=[10, 20, 40], help="Driver counts to test")
+    parser.add_argument('--laps', type=int, nargs='+', default=[57], help="Race lengths to test")
+    parser.add_argument('--compounds', nargs='+', default=list(DRY_COMPOUNDS), help="Compound mix")
+    parser.add_argument('--noise', type=float, default=0.3, help="Lap-time noise standard deviation (s)")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed calls per stage (best is kept)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_results.json', help="Where to write the JSON results")
+    args = parser.parse_args(argv)
+
+    results = []
+    for n_drivers, total_laps in itertools.product(args.drivers, args.laps):
+        results += benchmark_scale_point(n_drivers, total_laps, tuple(args.compounds), args.noise, args.repeat, args.seed)
+
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'settings': vars(args),
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} timings to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+from safety_car import summarize_race_times
+from strategy_core.stint_engine import StintEngine
+from strategy_core.strategy_array import COMPOUNDS, MAX_STOPS, StrategyArray
+
+# Resamples fitted per batch, which bounds memory at chunk x laps per array
+BOOTSTRAP_CHUNK = 500
+
+
+def bootstrap_rates(clean_laps, n_resamples=2000, seed=None, by=('Driver', 'Compound')):
+    """Degradation slopes refitted on laps resampled with replacement within every group.
+
+    clean_laps is the output of clean_stint_laps. All resamples are fitted in one
+    batched least-squares computation per chunk from per-group sums. Returns
+    (groups, slopes): the group keys and a (resample x group) slope array, with nan
+    where a resample has no spread in tyre life.
+    """
+    keys = list(by)
+    clean_laps = clean_laps.sort_values(by=keys, kind='stable')
+    codes = clean_laps.groupby(keys, sort=False).ngroup().to_numpy()
+    groups = clean_laps[keys].drop_duplicates().reset_index(drop=True)
+    sizes = np.bincount(codes)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    x = clean_laps['TyreLife'].to_numpy(dtype=float)
+    y = clean_laps['CorrectedLapTime'].to_numpy(dtype=float)
+    # Slopes do not change when y is shifted per group, and the sums stay well conditioned
+    y = y - (np.add.reduceat(y, starts) / sizes)[codes]
+
+    rng = np.random.default_rng(seed)
+    slopes = np.empty((n_resamples, len(groups)))
+    for first in range(0, n_resamples, BOOTSTRAP_CHUNK):
+        n = min(BOOTSTRAP_CHUNK, n_resamples - first)
+        # Every lap slot draws a lap from its own group
+        draws = starts[codes] + (rng.random((n, len(x))) * sizes[codes]).astype(int)
+        xs, ys = x[draws], y[draws]
+        sx, sy = np.add.reduceat(xs, starts, axis=1), np.add.reduceat(ys, starts, axis=1)
+        sxy, sxx = np.add.reduceat(xs * ys, starts, axis=1), np.add.reduceat(xs * xs, starts, axis=1)
+        denominator = sizes * sxx - sx * sx
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slopes[first:first + n] = np.where(denominator > 1e-9, (sizes * sxy - sx * sy) / denominator, np.nan)
+    return groups, slopes
+
+
+def compound_rate_samples(groups, slopes):
+    """Per-compound rate in every resample, averaged over drivers like the point summary."""
+    compounds = groups['Compound'].to_numpy()
+    return pd.DataFrame({
+        compound: np.nanmean(slopes[:, compounds == compound], axis=1)
+        for compound in pd.unique(compounds)
+    })
+
+
+def rate_intervals(rate_samples, level=0.9):
+    """Mean and central interval of each compound's rate over the resamples."""
+    tail = (1 - level) / 2 * 100
+    return pd.DataFrame({
+        'Compound': rate_samples.columns,
+        'Degradation': rate_samples.mean().to_numpy(),
+        'Low': np.nanpercentile(rate_samples, tail, axis=0),
+        'High': np.nanpercentile(rate_samples, 100 - tail, axis=0)
+    }).sort_values(by='Degradation').reset_index(drop=True)
+
+
+def wear_matrix(strategies, total_laps, compounds):
+    """(strategy x compound) sum of n(n+1)/2 over stints; race time is linear in the rates with these weights."""
+    _, stint_lengths = strategies.stint_bounds(total_laps)
+    wear = np.zeros((len(strategies), len(compounds)))
+    for slot in range(MAX_STOPS + 1):
+        codes = strategies.records['compounds'][:, slot]
+        for j, compound in enumerate(compounds):
+            rows = codes == COMPOUNDS.index(compound)
+            wear[rows, j] += stint_lengths[rows, slot] * (stint_lengths[rows, slot] + 1) / 2
+    return wear
+
+
+def bootstrap_strategy_times(strategies, rate_samples, total_laps, base_lap_time, fuel_effect_per_lap, pit_stop_time_loss):
+    """(resample x strategy) race times under every resampled set of linear degradation rates.
+
+    The rate-free part (base pace, fuel, pit stops) is the same in every resample,
+    so the whole table is one matrix product.
+    """
+    used = {COMPOUNDS[code] for code in np.unique(strategies.records['compounds']) if code >= 0}
+    missing = used - set(rate_samples.columns)
+    if missing:
+        raise ValueError(f"No degradation samples for {', '.join(sorted(missing))}")
+    compounds = list(rate_samples.columns)
+    zero_wear = StintEngine(pd.DataFrame({'Compound': compounds, 'Degradation': 0.0}), base_lap_time, fuel_effect_per_lap)
+    # Evaluated on a copy so the candidates keep their own total times
+    fixed = StrategyArray(strategies.records.copy()).evaluate(zero_wear, total_laps, pit_stop_time_loss).total_times
+    return fixed[None, :] + rate_samples.to_numpy() @ wear_matrix(strategies, total_laps, compounds).T
+
+
+def rank_with_uncertainty(strategies, rate_samples, total_laps, base_lap_time, fuel_effect_per_lap, pit_stop_time_loss):
+    """Candidate plans ranked by mean race time over the resamples, with intervals and win chances.
+
+    Adds P(Beats Next): how often each plan beats the next plan down the ranking
+    whose times differ from its own, which for the top plan is its win probability
+    against the runner-up. Mirror-image plans (e.g. MEDIUM-HARD (20) and
+    HARD-MEDIUM (37)) tie in every resample, so they are skipped over.
+    """
+    race_times = bootstrap_strategy_times(strategies, rate_samples, total_laps, base_lap_time, fuel_effect_per_lap, pit_stop_time_loss)
+    race_times = race_times[~np.isnan(race_times).any(axis=1)]
+    # Columns in ranking order, so the summary rows line up with the pairwise comparisons
+    order = np.argsort(race_times.mean(axis=0), kind='stable')
+    race_times = race_times[:, order]
+    labels = [f"{'-'.join(sequence)} ({', '.join(str(lap) for lap in pit_laps)})" for sequence, pit_laps in strategies[order].sequences()]
+    summary = summarize_race_times(race_times, labels)
+    same_as_next = np.append(np.isclose(race_times[:, :-1], race_times[:, 1:], rtol=0, atol=1e-6).all(axis=0), False)
+    beats_next = np.full(race_times.shape[1], np.nan)
+    for i in range(race_times.shape[1]):
+        # Ties are adjacent in the ranking, so the next different plan follows the run of ties
+        rival = i + int(np.argmin(same_as_next[i:])) + 1
+        if rival < race_times.shape[1]:
+            beats_next[i] = (race_times[:, i] < race_times[:, rival]).mean()
+    summary['P(Beats Next)'] = beats_next
+    return summary
@@ -0,0 +1,232 @@
+"""Persistent database of per-stint degradation fits across races, sessions and seasons.
+
+Example:
+    python degradation_db.py build --store lap_store
+    python degradation_db.py priors --event Bahrain --years 2022 2023
+"""
+import argparse
+import sqlite3
+from contextlib import closing, contextmanager
+
+from lap_store import DEFAULT_STORE_DIR, LapStore, event_key, load_laps
+from strategy_core.degradation_fit import MIN_STINT_LAPS, clean_stint_laps, fit_degradation_batch, fit_groups
+
+DEFAULT_DB_PATH = 'degradation.db'
+STINT_KEYS = ('Driver', 'Compound', 'Stint')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stint_fits (
+    year INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    event_key TEXT NOT NULL,
+    session TEXT NOT NULL,
+    driver TEXT NOT NULL,
+    compound TEXT NOT NULL,
+    stint INTEGER NOT NULL,
+    fuel_effect REAL NOT NULL,
+    degradation REAL NOT NULL,
+    intercept REAL NOT NULL,
+    laps INTEGER NOT NULL,
+    PRIMARY KEY (year, event_key, session, fuel_effect, driver, compound, stint)
+);
+CREATE INDEX IF NOT EXISTS stint_fits_track ON stint_fits (event_key, compound, year);
+CREATE INDEX IF NOT EXISTS stint_fits_compound ON stint_fits (compound, year);
+CREATE TABLE IF NOT EXISTS session_summaries (
+    year INTEGER NOT NULL,
+    event_key TEXT NOT NULL,
+    session TEXT NOT NULL,
+    fuel_effect REAL NOT NULL,
+    compound TEXT NOT NULL,
+    degradation REAL NOT NULL,
+    drivers INTEGER NOT NULL,
+    PRIMARY KEY (year, event_key, session, fuel_effect, compound)
+);
+"""
+
+
+def _fuel_key(fuel_effect_per_lap):
+    """Rounds the fuel effect so values like 0.04 and 0.04000000000000001 share their fits."""
+    return round(float(fuel_effect_per_lap), 6)
+
+
+class DegradationDB:
+    """SQLite table of fitted stints, indexed by track, compound and season.
+
+    Fits depend on the fuel correction, so every row records the fuel effect it
+    was fitted with and queries only return rows for one fuel effect.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps the database usable from any thread
+        with closing(sqlite3.connect(self.path)) as conn:
+            with conn:
+                yield conn
+
+    def has_session(self, year, event, session, fuel_effect_per_lap=0.04):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM stint_fits WHERE event_key = ? AND year = ? AND session = ? AND fuel_effect = ? LIMIT 1",
+                (event_key(event), int(year), session, _fuel_key(fuel_effect_per_lap))
+            ).fetchone()
+        return row is not None
+
+    def add_session(self, year, event, session, laps, fuel_effect_per_lap=0.04, min_laps=MIN_STINT_LAPS):
+        """Fits every reliable stint of a session and stores it, replacing earlier fits. Returns the stint count.
+
+        The session's per-compound summary, averaged over per-driver fits like the
+        app and degradation_summary.py report it, is stored alongside.
+        """
+        clean_laps = clean_stint_laps(laps, fuel_effect_per_lap, by=STINT_KEYS, min_laps=min_laps)
+        fits = fit_groups(clean_laps, by=STINT_KEYS)
+        key = (int(year), event_key(event), session, _fuel_key(fuel_effect_per_lap))
+        rows = [
+            (int(year), str(event), event_key(event), session, row.Driver, row.Compound, int(row.Stint),
+             _fuel_key(fuel_effect_per_lap), float(row.Degradation), float(row.Intercept), int(row.Laps))
+            for row in fits.itertuples(index=False)
+        ]
+        driver_fits = fit_degradation_batch(laps, fuel_effect_per_lap, min_laps=min_laps)
+        summary = driver_fits.groupby('Compound')['Degradation'].agg(['mean', 'size'])
+        summary_rows = [(*key, compound, float(row['mean']), int(row['size'])) for compound, row in summary.iterrows()]
+        with self._connect() as conn:
+            for table in ('stint_fits', 'session_summaries'):
+                conn.execute(f"DELETE FROM {table} WHERE year = ? AND event_key = ? AND session = ? AND fuel_effect = ?", key)
+            conn.executemany("INSERT INTO stint_fits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany("INSERT INTO session_summaries VALUES (?, ?, ?, ?, ?, ?, ?)", summary_rows)
+        return len(rows)
+
+    def _where(self, event, compound, years, session, fuel_effect_per_lap):
+        """Builds the WHERE clause shared by the queries; None means no filter."""
+        clauses, params = ['fuel_effect = ?'], [_fuel_key(fuel_effect_per_lap)]
+        if event is not None:
+            clauses.append('event_key = ?')
+            params.append(event_key(event))
+        if compound is not None:
+            clauses.append('compound = ?')
+            params.append(compound)
+        if years is not None:
+            years = [int(years)] if isinstance(years, int) else [int(year) for year in years]
+            clauses.append(f"year IN ({', '.join('?' * len(years))})")
+            params += years
+        if session is not None:
+            clauses.append('session = ?')
+            params.append(session)
+        return ' AND '.join(clauses), params
+
+    def query(self, event=None, compound=None, years=None, session=None, fuel_effect_per_lap=0.04):
+        """Stored stint fits matching the filters. years can be one season or a list of seasons."""
+        # pandas is only imported by the table queries, so session_summary needs sqlite alone
+        import pandas as pd
+
+        where, params = self._where(event, compound, years, session, fuel_effect_per_lap)
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT year AS Year, event AS Event, session AS Session, driver AS Driver, compound AS Compound, "
+                "stint AS Stint, degradation AS Degradation, intercept AS Intercept, laps AS Laps "
+                f"FROM stint_fits WHERE {where} ORDER BY year, event_key, session, driver, stint",
+                conn, params=params
+            )
+
+    def compound_priors(self, event=None, years=None, session=None, fuel_effect_per_lap=0.04):
+        """Lap-weighted mean degradation per compound over the matching stints.
+
+        Returns a Compound/Degradation table usable as a degradation summary, plus
+        the number of stints and laps behind each value.
+        """
+        import pandas as pd
+
+        where, params = self._where(event, None, years, session, fuel_effect_per_lap)
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT compound AS Compound, SUM(degradation * laps) / SUM(laps) AS Degradation, "
+                "COUNT(*) AS Stints, SUM(laps) AS Laps "
+                f"FROM stint_fits WHERE {where} GROUP BY compound ORDER BY Degradation",
+                conn, params=params
+            )
+
+    def session_summary(self, year, event, session, fuel_effect_per_lap=0.04):
+        """One session's Compound/Degradation summary averaged over drivers, with the driver count behind each value.
+
+        Returned as {column: list} without pandas; StintEngine and the simulators take
+        it like a degradation summary table, and pd.DataFrame(summary) gives the table.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT compound, degradation, drivers FROM session_summaries "
+                "WHERE year = ? AND event_key = ? AND session = ? AND fuel_effect = ? ORDER BY degradation",
+                (int(year), event_key(event), session, _fuel_key(fuel_effect_per_lap))
+            ).fetchall()
+        return {column: [row[i] for row in rows] for i, column in enumerate(('Compound', 'Degradation', 'Drivers'))}
+
+    def sessions(self):
+        """Lists the (year, event, session, fuel effect) keys that have fits stored."""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT DISTINCT year, event, session, fuel_effect FROM stint_fits ORDER BY year, event, session"
+            ).fetchall()
+
+
+def build_from_lap_store(db, store, fuel_effect_per_lap=0.04, force=False):
+    """Fits every session in a lap store that the database does not have yet."""
+    added = {}
+    for year, event, session in store.sessions():
+        if force or not db.has_session(year, event, session, fuel_effect_per_lap):
+            added[(year, event, session)] = db.add_session(year, event, session, store.read(year, event, session), fuel_effect_per_lap)
+    return added
+
+
+def session_priors(year, event, session, fuel_effect_per_lap=0.04, db=None, store=None, export=None):
+    """One session's degradation summary as the app reports it (see DegradationDB.session_summary).
+
+    A stored summary is read without pandas. On first use the session is fitted
+    from export, a lap export file for lap_import.py, if given, and otherwise from
+    the lap store (or fastf1). Compounds without a reliable driver fit are absent.
+    """
+    if db is None:
+        db = DegradationDB()
+    summary = db.session_summary(year, event, session, fuel_effect_per_lap)
+    if not summary['Compound']:
+        # Not fitted yet, or fitted before summaries were stored
+        if export is not None:
+            from lap_import import import_lap_export
+            laps = import_lap_export(export, year, event, session, store)
+        else:
+            laps = load_laps(year, event, session, store)
+        db.add_session(year, event, session, laps, fuel_effect_per_lap)
+        summary = db.session_summary(year, event, session, fuel_effect_per_lap)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the degradation database.")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Database file")
+    parser.add_argument('--fuel', type=float, default=0.04, help="Fuel effect (s/lap) used for the fits")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="Fit every stored session that is not in the database yet")
+    build.add_argument('--store', default=DEFAULT_STORE_DIR, help="Lap store directory")
+    build.add_argument('--force', action='store_true', help="Refit sessions already in the database")
+
+    priors = commands.add_parser('priors', help="Print per-compound degradation priors")
+    priors.add_argument('--event')
+    priors.add_argument('--years', type=int, nargs='+')
+    priors.add_argument('--session')
+    args = parser.parse_args(argv)
+
+    db = DegradationDB(args.db)
+    if args.command == 'build':
+        added = build_from_lap_store(db, LapStore(args.store), args.fuel, args.force)
+        for (year, event, session), num_stints in added.items():
+            print(f"{year} {event} {session}: {num_stints} stints")
+        print(f"Fitted {len(added)} session(s).")
+    else:
+        print(db.compound_priors(args.event, args.years, args.session, args.fuel).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
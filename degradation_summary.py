@@ -1,71 +1,51 @@
-import fastf1 as ff1
 import pandas as pd
-import numpy as np
 
-def calculate_degradation(laps, driver, compound, fuel_effect_per_lap = 0.04):
-    # Calculate the tyre degradation for a specific driver and compound, including fuel correction and outlier removal.
+from degradation_db import DegradationDB
+from lap_import import import_lap_export
+from strategy_core.degradation_fit import calculate_degradation
 
-        #1. Select the driver's lap for specified compound
-            stint_laps = laps.pick_driver(driver).loc[laps['Compound'] == compound].copy()
-        #2. Remove pit in/out laps
-            stint_laps = stint_laps.loc[stint_laps['PitInTime'].isnull() & stint_laps['PitOutTime'].isnull()].copy()
-        #3. Check if enough data is available to analyze 
-            if len(stint_laps) < 5:
-                return None
-        #4. Remove outliers 
-            stint_laps['LapTimeSeconds'] = stint_laps['LapTime'].dt.total_seconds()
-            median_lap_time = stint_laps['LapTimeSeconds'].median()
-            stint_laps = stint_laps.loc[stint_laps['LapTimeSeconds'] < median_lap_time * 1.07]. copy()
-        #5. Check again if enough data is available after removing outliers
-            if len (stint_laps) < 5:
-                    return None
-        #6. Calculate fuel-corrected lap time
-            fuel_correction = stint_laps['LapNumber'] * fuel_effect_per_lap
-            stint_laps['CorrectedLapTime'] = stint_laps['LapTimeSeconds'] + fuel_correction
-        #7. Fit a linear regression model
-            x = stint_laps ['TyreLife']
-            y = stint_laps ['CorrectedLapTime']
-            coeffs = np.polyfit(x,y,1)
+#This script's fit: at least 5 laps left after the 107% outlier cut
+MIN_LAPS = 5
 
-            degradation = coeffs[0]
+# === Main part of the script ===
+def main():
+    pd.set_option('display.max_columns', None)
+    pd.set_option('display.width', 200)
 
-            return degradation
+    #Load the session data (the bundled export is converted into the lap store on the first run, no network needed)
+    laps = import_lap_export('bahrain_2023.xlsx', 2023, 'Bahrain', 'R')
 
-# === Main part of the script === 
-ff1.Cache.enable_cache('cache')
-pd.set_option('display.max_columns', None)
-pd.set_option('display.width', 200)
+    # === Loop through all drivers and compounds to build the summary ===
+    results = []
+    drivers = laps['Driver'].unique() #Get a list of all drivers
+    compounds = laps['Compound'].unique() #Get a list of all unique compounds
 
-#Load the session data
-session = ff1.get_session(2023, 'Bahrain', 'R')
-session.load (telemetry=False, weather = False)
-laps = session.laps
+    for driver_abbr in drivers:
+        for compound in compounds:
+               #Check stint length before calculating degradation
+               stint_laps = laps.loc[(laps['Driver'] == driver_abbr) & (laps['Compound'] == compound)]
+               if len(stint_laps) >= 10: #stint laps greater than 10 to ensure no outliers effect
+                degradation = calculate_degradation(laps, driver_abbr, compound, min_laps=MIN_LAPS)
+                if degradation is not None:
+                      results.append({
+                        'Driver': driver_abbr,
+                        'Compound': compound,
+                        'Degradation': degradation     
+                      })
 
-# === Loop through all drivers and compounds to build the summary ===
-results = []
-drivers = session.drivers #Get a list of all driver numbers
-compounds = laps['Compound'].unique() #Get a list of all unique compounds
+    #Convert the results list to a DataFrame and sort it
+    reliable_summary = pd.DataFrame(results)
 
-for driver_num in drivers:
-    driver_abbr = laps.loc[laps['DriverNumber'] == driver_num, 'Driver'].iloc[0]
-    for compound in compounds:
-           #Check stint length before calculating degradation
-           stint_laps = laps.pick_driver(driver_abbr).loc[laps['Compound'] == compound]
-           if len(stint_laps) >= 10: #stint laps greater than 10 to ensure no outliers effect
-            degradation = calculate_degradation(laps, driver_abbr, compound)
-            if degradation is not None:
-                  results.append({
-                    'Driver': driver_abbr,
-                    'Compound': compound,
-                    'Degradation': degradation     
-                  })
+    #Calculate average degradation per second
+    degradation_summary = reliable_summary.groupby('Compound')['Degradation'].mean().reset_index()
+    degradation_summary = degradation_summary.sort_values (by='Degradation')
 
-#Convert the results list to a DataFrame and sort it
-reliable_summary = pd.DataFrame(results)
+    print("--- Average Tyre Degradation Summary (Bahrain 2023) ---")
+    print(degradation_summary)
 
-#Calculate average degradation per second
-degradation_summary = reliable_summary.groupby('Compound')['Degradation'].mean().reset_index()
-degradation_summary = degradation_summary.sort_values (by='Degradation')
+    # Store the per-stint fits so later scripts can query them instead of reloading the session
+    DegradationDB().add_session(2023, 'Bahrain', 'R', laps)
 
-print("--- Average Tyre Degradation Summary (Bahrain 2023) ---")
-print(degradation_summary)
\ No newline at end of file
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+
+from strategy_core.degradation_fit import fit_groups
+from strategy_core.strategy_array import COMPOUNDS, MAX_STOPS, StrategyArray
+
+# A car closer than this to the car ahead at the start of a lap runs in dirty air
+DIRTY_AIR_GAP = 1.0
+# Time lost on a lap spent right behind another car, fading to 0 at DIRTY_AIR_GAP
+DIRTY_AIR_PENALTY = 0.4
+# Pace advantage (s/lap) a car needs to pass the car ahead on track; higher at tracks that are hard to pass at
+OVERTAKE_DELTA = 0.8
+# Closest a car held up in traffic can follow the car ahead across the line
+MIN_FOLLOW_GAP = 0.3
+# Gap between grid slots when the race starts
+START_GAP = 0.25
+
+
+def session_strategies(laps, total_laps=None):
+    """Each driver's actual compound order and pit laps in a session, as (drivers, StrategyArray).
+
+    Stints on unknown compounds take the compound of a neighbouring stint, and
+    only the first MAX_STOPS stops are kept.
+    """
+    stints = laps.loc[laps['Stint'].notna()].assign(Compound=laps['Compound'].where(laps['Compound'].isin(COMPOUNDS)))
+    stints = stints.groupby(['Driver', 'Stint'], sort=True).agg(Compound=('Compound', 'first'), LastLap=('LapNumber', 'max'))
+    drivers, sequences = [], []
+    for driver, driver_stints in stints.groupby(level='Driver', sort=False):
+        compounds = driver_stints['Compound'].ffill().bfill()
+        if compounds.isna().all():
+            continue
+        pit_laps = [int(lap) for lap in driver_stints['LastLap'].iloc[:-1] if total_laps is None or lap < total_laps]
+        sequences.append((list(compounds.iloc[:MAX_STOPS + 1]), pit_laps[:MAX_STOPS]))
+        drivers.append(driver)
+    return drivers, StrategyArray.from_sequences([(sequence[:len(pit_laps) + 1], pit_laps) for sequence, pit_laps in sequences])
+
+
+def driver_pace_offsets(clean_laps, drivers):
+    """Each driver's pace relative to the field (s/lap), from fuel-corrected fits at zero tyre life.
+
+    Compares intercepts compound by compound so a driver is not judged on which
+    tyres they happened to use. Drivers without a reliable stint get 0.
+    """
+    fits = fit_groups(clean_laps, by=('Driver', 'Compound'))
+    fits['Offset'] = fits['Intercept'] - fits.groupby('Compound')['Intercept'].transform('mean')
+    offsets = fits.groupby('Driver')['Offset'].mean()
+    return offsets.reindex(drivers).fillna(0.0).to_numpy()
+
+
+def lap_one_order(laps, drivers):
+    """Grid order approximated by the order the drivers completed lap 1 in."""
+    lap_one = laps.loc[laps['LapNumber'] == 1].set_index('Driver')['LapTime'].dt.total_seconds()
+    lap_one = lap_one.reindex(drivers).fillna(np.inf).to_numpy()
+    return np.argsort(lap_one, kind='stable')
+
+
+def _tyre_table(engine, total_laps):
+    """(compound code x tyre life) tyre effect; compounds without data use the mean of the known curves."""
+    tyre_life = np.arange(total_laps + 1)
+    known = {compound: engine.tyre_effect(compound, tyre_life) for compound in COMPOUNDS if compound in engine.rates}
+    if not known:
+        raise ValueError("The engine has no degradation data")
+    fallback = np.mean(list(known.values()), axis=0)
+    return np.array([known.get(compound, fallback) for compound in COMPOUNDS])
+
+
+def field_lap_times(engine, strategies, pace_offsets, total_laps):
+    """Free-air lap times and pit laps for every car, as two (race x car x lap) arrays.
+
+    strategies holds n_races * n_cars strategies, car-major within each race.
+    """
+    n_cars = len(pace_offsets)
+    records = strategies.records
+    laps = np.arange(1, total_laps + 1)
+
+    pit_laps = records['pit_laps'].astype(int)
+    pit_laps[np.arange(MAX_STOPS)[None, :] >= records['stops'][:, None]] = total_laps + 1
+    stint_index = (laps[None, :, None] > pit_laps[:, None, :]).sum(axis=2)
+    stint_start = np.concatenate([np.zeros((len(records), 1), dtype=int), pit_laps], axis=1)
+    tyre_life = laps[None, :] - np.take_along_axis(stint_start, stint_index, axis=1)
+    compound_code = np.take_along_axis(records['compounds'].astype(int), stint_index, axis=1)
+
+    lap_times = (
+        engine.base_lap_time - engine.fuel_effect_per_lap * laps[None, :]
+        + np.tile(np.asarray(pace_offsets, dtype=float), len(records) // n_cars)[:, None]
+        + _tyre_table(engine, total_laps)[compound_code, tyre_life]
+    )
+    pit_mask = np.zeros(lap_times.shape, dtype=bool)
+    rows, stops = np.nonzero(pit_laps <= total_laps)
+    pit_mask[rows, pit_laps[rows, stops] - 1] = True
+    return lap_times.reshape(-1, n_cars, total_laps), pit_mask.reshape(-1, n_cars, total_laps)
+
+
+def simulate_field(engine, strategies, pace_offsets, total_laps, pit_stop_time_loss, grid=None,
+                   overtake_delta=OVERTAKE_DELTA, dirty_air_gap=DIRTY_AIR_GAP, dirty_air_penalty=DIRTY_AIR_PENALTY,
+                   min_follow_gap=MIN_FOLLOW_GAP, start_gap=START_GAP):
+    """Simulates whole races lap by lap with dirty air and on-track overtaking limits.
+
+    strategies is a StrategyArray with one strategy per car, or n_races * n_cars
+    strategies to run several races at once. grid lists car indices from pole
+    backwards. Each lap, a car that is not overtake_delta faster than the car ahead
+    cannot pass it on track and crosses the line at least min_follow_gap behind
+    it; stops happen in the pit lane and are never blocked. A car is only held up
+    by the car directly ahead of it.
+
+    Returns (race_times, positions, traffic_loss), each (race x car); positions start at 1.
+    """
+    lap_times, pit_mask = field_lap_times(engine, strategies, pace_offsets, total_laps)
+    n_races, n_cars, _ = lap_times.shape
+    lap_times = lap_times + pit_mask * pit_stop_time_loss
+    slot = np.arange(n_cars)
+
+    grid = slot if grid is None else np.asarray(grid)
+    race_times = np.zeros((n_races, n_cars))
+    race_times[:, grid] = slot * start_gap
+    traffic_loss = np.zeros((n_races, n_cars))
+    for lap in range(total_laps):
+        # Running order at the start of the lap
+        order = np.argsort(race_times, axis=1, kind='stable')
+        ahead_time = np.take_along_axis(race_times, order, axis=1)
+        lap_time = np.take_along_axis(lap_times[:, :, lap], order, axis=1)
+        pitting = np.take_along_axis(pit_mask[:, :, lap], order, axis=1)
+
+        gap = np.diff(ahead_time, axis=1, prepend=-np.inf)
+        dirty_air = dirty_air_penalty * np.clip(1 - gap / dirty_air_gap, 0, 1)
+        arrival = ahead_time + lap_time + dirty_air
+
+        # Chains of cars that cannot pass start again wherever a pass or a stop happens
+        pace_advantage = -np.diff(lap_time, axis=1, prepend=np.inf)
+        free = (pace_advantage >= overtake_delta) | pitting | np.roll(pitting, 1, axis=1)
+        free[:, 0] = True
+        # a'_i = max(a_i, a'_(i-1) + gap) within a chain, i.e. a running max of a_i - i * gap
+        shifted = arrival - slot * min_follow_gap
+        chain = np.cumsum(free, axis=1)
+        offset = (np.ptp(shifted, axis=1, keepdims=True) + 1) * chain
+        held = np.maximum.accumulate(shifted + offset, axis=1) - offset + slot * min_follow_gap
+
+        np.put_along_axis(traffic_loss, order, np.take_along_axis(traffic_loss, order, axis=1) + held - arrival + dirty_air, axis=1)
+        np.put_along_axis(race_times, order, held, axis=1)
+
+    positions = np.argsort(np.argsort(race_times, axis=1, kind='stable'), axis=1) + 1
+    return race_times, positions, traffic_loss
+
+
+def summarize_field(race_times, positions, traffic_loss, drivers, strategies, race=0):
+    """Finishing order of one simulated race with each driver's plan and time lost in traffic."""
+    n_cars = len(drivers)
+    plans = strategies[race * n_cars:(race + 1) * n_cars]
+    summary = pd.DataFrame({
+        'Position': positions[race],
+        'Driver': drivers,
+        'Strategy': [f"{'-'.join(sequence)} ({', '.join(str(lap) for lap in pit_laps)})" for sequence, pit_laps in plans.sequences()],
+        'Race Time (s)': race_times[race],
+        'Gap (s)': race_times[race] - race_times[race].min(),
+        'Traffic Loss (s)': traffic_loss[race]
+    })
+    return summary.sort_values(by='Position').reset_index(drop=True)
+
+
+def evaluate_in_traffic(engine, field_strategies, car, candidates, pace_offsets, total_laps, pit_stop_time_loss, **race_options):
+    """Races every candidate plan for one car against the rest of the field, all in one batch.
+
+    The other cars keep their strategies from field_strategies. Returns one row per
+    candidate with its finishing position, race time and traffic loss, best first.
+    """
+    n_cars = len(pace_offsets)
+    records = np.tile(field_strategies.records, len(candidates))
+    records[car::n_cars] = candidates.records
+    race_times, positions, traffic_loss = simulate_field(
+        engine, StrategyArray(records), pace_offsets, total_laps, pit_stop_time_loss, **race_options
+    )
+    plans = candidates.to_frame()
+    plans['Total Time (s)'] = race_times[:, car]
+    plans['Finish Position'] = positions[:, car]
+    plans['Traffic Loss (s)'] = traffic_loss[:, car]
+    return plans.sort_values(by=['Finish Position', 'Total Time (s)']).reset_index(drop=True)
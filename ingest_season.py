@@ -0,0 +1,80 @@
+"""Loads whole seasons (or chosen events) through fastf1 into the local lap store.
+
+Example:
+    python ingest_season.py 2023 --sessions FP2 R --workers 4
+    python ingest_season.py 2024 --events Bahrain "Saudi Arabia" --sessions R
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from lap_store import DEFAULT_STORE_DIR, LapStore, fetch_session_laps
+
+
+def season_events(year):
+    """Returns the event names of a season's race weekends (testing excluded)."""
+    import fastf1 as ff1
+
+    schedule = ff1.get_event_schedule(year, include_testing=False)
+    return list(schedule['EventName'])
+
+
+def ingest_session(year, event, session, store_dir):
+    """Worker: fetches one session and writes it into the lap store."""
+    laps = fetch_session_laps(year, event, session)
+    LapStore(store_dir).write(year, event, session, laps)
+    return len(laps)
+
+
+def ingest(year, events, sessions, store_dir=DEFAULT_STORE_DIR, workers=4, force=False):
+    """Ingests every (event, session) pair, skipping sessions already in the store.
+
+    Returns one {'Year', 'Event', 'Session', 'Status', 'Laps'} row per session.
+    """
+    store = LapStore(store_dir)
+    results = []
+    pending = []
+    for event in events:
+        for session in sessions:
+            if not force and store.has(year, event, session):
+                results.append({'Year': year, 'Event': event, 'Session': session, 'Status': 'skipped', 'Laps': None})
+            else:
+                pending.append((event, session))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(ingest_session, year, event, session, store_dir): (event, session)
+            for event, session in pending
+        }
+        for future in as_completed(futures):
+            event, session = futures[future]
+            try:
+                num_laps = future.result()
+                row = {'Year': year, 'Event': event, 'Session': session, 'Status': 'ingested', 'Laps': num_laps}
+            except Exception as e:
+                # One missing session (e.g. no FP2 on a sprint weekend) should not stop the season
+                row = {'Year': year, 'Event': event, 'Session': session, 'Status': f'failed: {e}', 'Laps': None}
+            print(f"{year} {event} {session}: {row['Status']}")
+            results.append(row)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest F1 sessions into the local lap store.")
+    parser.add_argument('year', type=int)
+    parser.add_argument('--events', nargs='+', help="Event names (default: every event of the season)")
+    parser.add_argument('--sessions', nargs='+', default=['R'], help="Session codes, e.g. FP1 FP2 FP3 Q R")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help="Lap store directory")
+    parser.add_argument('--workers', type=int, default=4, help="Number of sessions loaded in parallel")
+    parser.add_argument('--force', action='store_true', help="Re-ingest sessions that are already stored")
+    args = parser.parse_args(argv)
+
+    events = args.events or season_events(args.year)
+    results = ingest(args.year, events, args.sessions, args.store, args.workers, args.force)
+
+    ingested = sum(row['Status'] == 'ingested' for row in results)
+    skipped = sum(row['Status'] == 'skipped' for row in results)
+    print(f"Ingested {ingested}, skipped {skipped}, failed {len(results) - ingested - skipped} session(s).")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Imports offline lap exports (Excel or CSV with fastf1's session.laps columns) into the lap store.
+
+Reading a spreadsheet is slow, so each export is converted once and later loads
+read the Parquet copy; an export is only converted again when it changes. Once
+imported, load_laps (and so the app) finds the session without network access.
+
+Example:
+    python lap_import.py bahrain_2023.xlsx --year 2023 --event Bahrain --session R
+"""
+import argparse
+import os
+
+import pandas as pd
+
+from lap_store import DEFAULT_STORE_DIR, LAP_COLUMNS, LapStore
+
+# Duration columns of session.laps; exports store them as numbers or strings
+TIMEDELTA_COLUMNS = [
+    'Time', 'LapTime', 'PitOutTime', 'PitInTime', 'Sector1Time', 'Sector2Time', 'Sector3Time',
+    'Sector1SessionTime', 'Sector2SessionTime', 'Sector3SessionTime', 'LapStartTime'
+]
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm', '.xls')
+
+
+def read_lap_export(path, sheet_name=0):
+    """Reads an Excel or CSV lap export back into session.laps types.
+
+    Excel keeps durations as fractions of a day and numeric CSV durations are
+    taken as seconds; text durations like '0 days 00:01:39.019' parse either way.
+    """
+    is_excel = path.lower().endswith(EXCEL_EXTENSIONS)
+    laps = pd.read_excel(path, sheet_name=sheet_name) if is_excel else pd.read_csv(path)
+    missing = [c for c in LAP_COLUMNS if c not in laps.columns]
+    if missing:
+        raise ValueError(f"{path} is missing lap columns: {', '.join(missing)}")
+
+    for column in TIMEDELTA_COLUMNS:
+        if column not in laps.columns:
+            continue
+        if pd.api.types.is_numeric_dtype(laps[column]):
+            # Day fractions pick up float noise; timing data is only kept to the millisecond
+            laps[column] = pd.to_timedelta(laps[column], unit='D' if is_excel else 's').dt.round('ms')
+        else:
+            laps[column] = pd.to_timedelta(laps[column], errors='coerce')
+    # fastf1 keeps these as floats so missing values survive
+    for column in ('LapNumber', 'TyreLife', 'Stint'):
+        laps[column] = pd.to_numeric(laps[column], errors='coerce').astype(float)
+    return laps
+
+
+def import_lap_export(path, year, event, session, store=None, force=False, sheet_name=0):
+    """Returns an export's laps from the lap store, converting the export first if needed."""
+    if store is None:
+        store = LapStore()
+    stored_path = store.path(year, event, session)
+    if force or not store.has(year, event, session) or os.path.getmtime(path) > os.path.getmtime(stored_path):
+        store.write(year, event, session, read_lap_export(path, sheet_name))
+    return store.read(year, event, session)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert an Excel/CSV lap export into the lap store.")
+    parser.add_argument('path', help="Excel or CSV file with session.laps columns")
+    parser.add_argument('--year', type=int, required=True)
+    parser.add_argument('--event', required=True)
+    parser.add_argument('--session', default='R')
+    parser.add_argument('--sheet', default=0, help="Excel sheet name or index")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help="Lap store directory")
+    parser.add_argument('--force', action='store_true', help="Convert again even if the store is up to date")
+    args = parser.parse_args(argv)
+
+    sheet = int(args.sheet) if str(args.sheet).isdigit() else args.sheet
+    laps = import_lap_export(args.path, args.year, args.event, args.session, LapStore(args.store), args.force, sheet)
+    print(f"{args.year} {args.event} {args.session}: {len(laps)} laps in {args.store}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import os
+import re
+import unicodedata
+
+# Only the columns the degradation model and strategy search use, plus the session
+# time at the end of each lap, which gives exact gaps between cars
+LAP_COLUMNS = ['Driver', 'Compound', 'LapTime', 'LapNumber', 'TyreLife', 'PitInTime', 'PitOutTime', 'Stint', 'Time']
+DEFAULT_STORE_DIR = 'lap_store'
+CACHE_DIR = 'cache'
+
+
+# fastf1 names events like 'Saudi Arabian Grand Prix'; the app and scripts say 'Saudi Arabia'.
+# Keys left after dropping 'Grand Prix' that differ from the short name, mapped onto it
+EVENT_ALIASES = {
+    'saudi_arabian': 'saudi_arabia', 'australian': 'australia', 'japanese': 'japan', 'chinese': 'china',
+    'canadian': 'canada', 'spanish': 'spain', 'austrian': 'austria', 'british': 'great_britain',
+    'britain': 'great_britain', 'hungarian': 'hungary', 'belgian': 'belgium', 'dutch': 'netherlands',
+    'italian': 'italy', 'mexican': 'mexico', 'mexico_city': 'mexico', 'brazilian': 'brazil',
+    'sao_paulo': 'brazil', 'french': 'france', 'portuguese': 'portugal', 'russian': 'russia',
+    'turkish': 'turkey', 'german': 'germany', 'styrian': 'styria', 'tuscan': 'tuscany',
+    'usa': 'united_states', 'us': 'united_states'
+}
+
+
+def event_key(name):
+    """Turns an event name into the file-system friendly key shared by every spelling of it.
+
+    'Saudi Arabia', 'Saudi Arabian Grand Prix' and 'saudi arabian gp' all give 'saudi_arabia'.
+    """
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode()
+    key = re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+    key = re.sub(r'_(grand_prix|gp)$', '', key)
+    return EVENT_ALIASES.get(key, key)
+
+
+class LapStore:
+    """Columnar on-disk store of session laps, one Parquet file per (year, event, session)."""
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+
+    def path(self, year, event, session):
+        return os.path.join(self.root, str(int(year)), event_key(event), f"{session}.parquet")
+
+    def has(self, year, event, session):
+        return os.path.exists(self.path(year, event, session))
+
+    def write(self, year, event, session, laps):
+        """Writes the model columns of a laps table, replacing any previous copy."""
+        # pyarrow is only imported once a session is actually written or read
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        path = self.path(year, event, session)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(laps[LAP_COLUMNS].reset_index(drop=True), preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b'year': str(int(year)).encode(),
+            b'event': str(event).encode(),
+            b'session': str(session).encode()
+        })
+        # Write to a temporary file first so a crash never leaves a half-written session behind
+        tmp_path = path + '.tmp'
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    def read(self, year, event, session, columns=None):
+        """Reads a stored session back as a DataFrame through a memory-mapped file."""
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(self.path(year, event, session), columns=columns, memory_map=True)
+        return table.to_pandas()
+
+    def sessions(self):
+        """Lists the (year, event, session) keys of every stored session."""
+        import pyarrow.parquet as pq
+
+        keys = []
+        if not os.path.isdir(self.root):
+            return keys
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in sorted(filenames):
+                if not filename.endswith('.parquet'):
+                    continue
+                metadata = pq.read_schema(os.path.join(dirpath, filename)).metadata or {}
+                keys.append((
+                    int(metadata[b'year'].decode()),
+                    metadata[b'event'].decode(),
+                    metadata[b'session'].decode()
+                ))
+        return sorted(keys)
+
+
+def fetch_session_laps(year, event, session, cache_dir=CACHE_DIR):
+    """Loads a session's laps through fastf1 (network on first use, then fastf1's cache)."""
+    # fastf1 is slow to import, so only pay for it when a session is not in the store
+    import fastf1 as ff1
+
+    os.makedirs(cache_dir, exist_ok=True)
+    ff1.Cache.enable_cache(cache_dir)
+    f1_session = ff1.get_session(year, event, session)
+    f1_session.load(telemetry=False, weather=False)
+    return f1_session.laps
+
+
+def load_laps(year, event, session, store=None):
+    """Returns a session's laps from the lap store, ingesting it through fastf1 on a miss."""
+    if store is None:
+        store = LapStore()
+    if not store.has(year, event, session):
+        store.write(year, event, session, fetch_session_laps(year, event, session))
+    return store.read(year, event, session)
@@ -0,0 +1,140 @@
+"""Replays a stored session lap by lap and re-optimizes the rest of the race after every lap.
+
+The replayed laps stand in for a live timing feed. Degradation fits are kept as
+running least-squares sums, so each new lap is an O(1) update instead of a refit.
+
+Example:
+    python live_strategy.py --year 2023 --event Bahrain --drivers VER LEC
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from degradation_db import DegradationDB
+from lap_store import event_key, load_laps
+from online_fit import DegradationEstimator
+from strategy_core.degradation_fit import MIN_STINT_LAPS
+from strategy_core.stint_engine import StintEngine
+from strategy_core.strategy_search import optimize_remaining_race
+
+
+def lap_feed(laps):
+    """Yields (lap number, that lap's rows for every driver) in race order."""
+    for lap_number, lap_rows in laps.groupby('LapNumber', sort=True):
+        yield int(lap_number), lap_rows
+
+
+def earlier_season_priors(db, event, year, session, fuel_effect_per_lap=0.04):
+    """Per-compound priors from earlier seasons at the same track, or None if there are none."""
+    years = sorted({y for y, e, s, fuel in db.sessions()
+                    if y < year and event_key(e) == event_key(event) and s == session and np.isclose(fuel, fuel_effect_per_lap)})
+    if not years:
+        return None
+    return db.compound_priors(event, years, session, fuel_effect_per_lap)[['Compound', 'Degradation']]
+
+
+class LiveRace:
+    """Follows a race from the lap feed and re-solves the remaining race for each driver after every lap.
+
+    Compounds without enough live laps yet fall back to priors, if given.
+    """
+
+    def __init__(self, total_laps, base_lap_time, pit_stop_time_loss, fuel_effect_per_lap=0.04, priors=None,
+                 drivers=None, max_stops=2, min_laps=MIN_STINT_LAPS):
+        self.total_laps = total_laps
+        self.base_lap_time = base_lap_time
+        self.pit_stop_time_loss = pit_stop_time_loss
+        self.fuel_effect_per_lap = fuel_effect_per_lap
+        self.priors = priors
+        self.drivers = drivers
+        self.max_stops = max_stops
+        self.degradation = DegradationEstimator(fuel_effect_per_lap, min_laps)
+        # driver -> latest lap, compound, tyre life and compounds used
+        self.states = {}
+
+    def degradation_summary(self):
+        live = self.degradation.summary()
+        if self.priors is None:
+            return live
+        priors = self.priors.loc[~self.priors['Compound'].isin(live['Compound'])]
+        return pd.concat([live, priors], ignore_index=True)
+
+    def _update_states(self, laps):
+        for row in laps.itertuples(index=False):
+            if not isinstance(row.Compound, str) or pd.isna(row.TyreLife):
+                continue
+            state = self.states.setdefault(row.Driver, {'Used': set()})
+            state.update(Lap=int(row.LapNumber), Compound=row.Compound, TyreLife=int(row.TyreLife))
+            state['Used'].add(row.Compound)
+
+    def update(self, laps):
+        """Takes one lap of the feed; returns each tracked driver's best plan for the rest of the race."""
+        self.degradation.add_laps(laps)
+        self._update_states(laps)
+        engine = StintEngine(self.degradation_summary(), self.base_lap_time, self.fuel_effect_per_lap)
+
+        rows = []
+        for driver in self.drivers or sorted(self.states):
+            state = self.states.get(driver)
+            if state is None or state['Lap'] >= self.total_laps:
+                continue
+            try:
+                plan = optimize_remaining_race(engine, state['Lap'], state['Compound'], state['TyreLife'], state['Used'],
+                                               self.total_laps, self.pit_stop_time_loss, self.max_stops)
+            except ValueError:
+                plan = None
+            rows.append({
+                'Lap': state['Lap'],
+                'Driver': driver,
+                'Compound': state['Compound'],
+                'Tyre Life': state['TyreLife'],
+                'Strategy': None if plan is None else plan['Strategy'],
+                'Pit Laps': None if plan is None else ', '.join(str(int(plan[c])) for c in plan.index if c.startswith('Pit Lap')),
+                'Remaining Time (s)': np.nan if plan is None else plan['Total Time (s)']
+            })
+        return pd.DataFrame(rows, columns=['Lap', 'Driver', 'Compound', 'Tyre Life', 'Strategy', 'Pit Laps', 'Remaining Time (s)'])
+
+
+def replay_session(laps, live_race, until_lap=None):
+    """Feeds a stored session to a LiveRace lap by lap; yields (lap, plans, update seconds)."""
+    for lap_number, lap_rows in lap_feed(laps):
+        if until_lap is not None and lap_number > until_lap:
+            break
+        start = time.perf_counter()
+        plans = live_race.update(lap_rows)
+        yield lap_number, plans, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a session lap by lap and re-optimize the remaining race.")
+    parser.add_argument('--year', type=int, default=2023)
+    parser.add_argument('--event', default='Bahrain')
+    parser.add_argument('--session', default='R')
+    parser.add_argument('--drivers', nargs='+', help="Drivers to follow (default: all)")
+    parser.add_argument('--total-laps', type=int, help="Race length (default: laps in the session)")
+    parser.add_argument('--base-lap-time', type=float, default=99.5)
+    parser.add_argument('--pit-loss', type=float, default=22.0)
+    parser.add_argument('--fuel', type=float, default=0.04, help="Fuel effect (s/lap)")
+    parser.add_argument('--max-stops', type=int, default=2, help="Most stops left to plan")
+    parser.add_argument('--db', help="Degradation database to take earlier-season priors from")
+    args = parser.parse_args(argv)
+
+    laps = load_laps(args.year, args.event, args.session)
+    total_laps = args.total_laps or int(laps['LapNumber'].max())
+    priors = None if args.db is None else earlier_season_priors(DegradationDB(args.db), args.event, args.year, args.session, args.fuel)
+    live_race = LiveRace(total_laps, args.base_lap_time, args.pit_loss, args.fuel, priors, args.drivers, args.max_stops)
+
+    update_times = []
+    for lap_number, plans, seconds in replay_session(laps, live_race):
+        update_times.append(seconds)
+        for plan in plans.to_dict('records'):
+            print(f"Lap {lap_number:>2} {plan['Driver']:>4} {plan['Compound']} ({plan['Tyre Life']} laps): "
+                  f"{plan['Strategy'] or 'no plan'} ({plan['Pit Laps'] or '-'})  [{seconds * 1000:.1f} ms]")
+    lap_time = laps['LapTime'].dt.total_seconds().median()
+    print(f"Slowest update {max(update_times) * 1000:.1f} ms, median lap time {lap_time:.1f} s.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+import bisect
+
+import numpy as np
+import pandas as pd
+
+from strategy_core.degradation_fit import MIN_STINT_LAPS, OUTLIER_THRESHOLD
+
+# Lap times are binned to this many seconds for the streaming median
+MEDIAN_RESOLUTION = 0.01
+STINT_KEYS = ('Driver', 'Compound', 'Stint')
+
+
+class StreamingMedian:
+    """Approximate median from a histogram of values binned to resolution.
+
+    The occupied bins are kept sorted, so add and remove cost a binary search
+    (plus a list insert for a new bin) and median() walks the bins once, O(bins)
+    with no sorting. A stint's lap times span a few hundred bins at most. The
+    median is exact up to the bin width, which is far finer than the 107% rule needs.
+    """
+
+    def __init__(self, resolution=MEDIAN_RESOLUTION):
+        self.resolution = resolution
+        self.counts = {}
+        self.keys = []
+        self.n = 0
+
+    def _bin(self, value):
+        return int(round(value / self.resolution))
+
+    def add(self, value):
+        key = self._bin(value)
+        if key not in self.counts:
+            bisect.insort(self.keys, key)
+            self.counts[key] = 0
+        self.counts[key] += 1
+        self.n += 1
+
+    def remove(self, value):
+        key = self._bin(value)
+        if key not in self.counts:
+            raise ValueError(f"{value} was never added")
+        self.counts[key] -= 1
+        if not self.counts[key]:
+            del self.counts[key]
+            del self.keys[bisect.bisect_left(self.keys, key)]
+        self.n -= 1
+
+    def merge(self, other):
+        if other.resolution != self.resolution:
+            raise ValueError("Cannot merge medians with different resolutions")
+        for key, count in other.counts.items():
+            if key not in self.counts:
+                bisect.insort(self.keys, key)
+                self.counts[key] = 0
+            self.counts[key] += count
+        self.n += other.n
+        return self
+
+    def median(self):
+        """Median of the binned values (mean of the middle two for an even count), or nan if empty."""
+        if not self.n:
+            return np.nan
+        # 0-based ranks of the middle value(s)
+        low_rank, high_rank = (self.n - 1) // 2, self.n // 2
+        seen, low = 0, None
+        for key in self.keys:
+            seen += self.counts[key]
+            if low is None and seen > low_rank:
+                low = key
+            if seen > high_rank:
+                return (low + key) / 2 * self.resolution
+
+
+class LeastSquaresSums:
+    """Sufficient statistics (n, sum x, sum y, sum xy, sum xx) of a straight-line fit of y on x.
+
+    add and remove take scalars or arrays, and two fits over disjoint points merge
+    by adding their sums.
+    """
+    __slots__ = ('n', 'sx', 'sy', 'sxy', 'sxx')
+
+    def __init__(self):
+        self.n = 0
+        self.sx = self.sy = self.sxy = self.sxx = 0.0
+
+    def add(self, x, y, sign=1):
+        x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        self.n += sign * x.size
+        self.sx += sign * x.sum()
+        self.sy += sign * y.sum()
+        self.sxy += sign * (x * y).sum()
+        self.sxx += sign * (x * x).sum()
+
+    def remove(self, x, y):
+        self.add(x, y, sign=-1)
+
+    def merge(self, other):
+        self.n += other.n
+        self.sx += other.sx
+        self.sy += other.sy
+        self.sxy += other.sxy
+        self.sxx += other.sxx
+        return self
+
+    @property
+    def slope(self):
+        denominator = self.n * self.sxx - self.sx * self.sx
+        return (self.n * self.sxy - self.sx * self.sy) / denominator if denominator > 0 else np.nan
+
+    @property
+    def intercept(self):
+        return (self.sy - self.slope * self.sx) / self.n if self.n else np.nan
+
+
+class _StintFit:
+    """One stint's laps sorted by lap time; the first n_accepted pass the 107% cut and are in the sums.
+
+    The cut is re-applied whenever the median moves, so a slow lap taken while
+    the stint was short comes back out of the sums once faster laps arrive.
+    """
+    __slots__ = ('sums', 'median', 'laps', 'n_accepted')
+
+    def __init__(self, resolution):
+        self.sums = LeastSquaresSums()
+        self.median = StreamingMedian(resolution)
+        # (lap time, lap number, tyre life, fuel-corrected lap time), fastest first
+        self.laps = []
+        self.n_accepted = 0
+
+    @property
+    def lap_numbers(self):
+        return {lap[1] for lap in self.laps}
+
+    def index(self, lap_number):
+        # Looked up by lap number, since a lap time converted again may differ in the last bit
+        for i, lap in enumerate(self.laps):
+            if lap[1] == lap_number:
+                return i
+        raise ValueError(f"Lap {lap_number} was never added")
+
+    def apply_cut(self):
+        """Moves the accepted boundary to the current median, updating the sums lap by lap."""
+        threshold = self.median.median() * OUTLIER_THRESHOLD
+        while self.n_accepted < len(self.laps) and self.laps[self.n_accepted][0] < threshold:
+            _, _, tyre_life, corrected = self.laps[self.n_accepted]
+            self.sums.add(tyre_life, corrected)
+            self.n_accepted += 1
+        while self.n_accepted > 0 and not self.laps[self.n_accepted - 1][0] < threshold:
+            self.n_accepted -= 1
+            _, _, tyre_life, corrected = self.laps[self.n_accepted]
+            self.sums.remove(tyre_life, corrected)
+
+
+class DegradationEstimator:
+    """Online degradation fits per (session, driver, compound, stint) from sufficient statistics.
+
+    Laps can be added and removed one at a time, and estimators built from
+    different laps merged, without refitting. session labels the laps this
+    estimator takes (e.g. (2023, 'Bahrain', 'R')): stints from different sessions
+    stay separate fits after a merge, and only stints of the same session pool
+    their sums. Every stint applies the 107% rule against its current median,
+    so once a stint is complete its fit matches clean_stint_laps and fit_groups
+    by (driver, compound, stint).
+    """
+
+    def __init__(self, fuel_effect_per_lap=0.04, min_laps=MIN_STINT_LAPS, resolution=MEDIAN_RESOLUTION, session=None):
+        self.fuel_effect_per_lap = fuel_effect_per_lap
+        self.min_laps = min_laps
+        self.resolution = resolution
+        self.session = session
+        self.stints = {}
+
+    def _stint(self, key):
+        if key not in self.stints:
+            self.stints[key] = _StintFit(self.resolution)
+        return self.stints[key]
+
+    def add_lap(self, driver, compound, stint, lap_number, tyre_life, lap_time):
+        """Adds one lap; returns False if it is currently cut as an outlier."""
+        fit = self._stint((self.session, driver, compound, stint))
+        lap = (lap_time, lap_number, tyre_life, lap_time + lap_number * self.fuel_effect_per_lap)
+        i = bisect.bisect_left(fit.laps, lap)
+        fit.laps.insert(i, lap)
+        if i < fit.n_accepted:
+            # Inserted inside the accepted laps: count it now, then let the cut move the boundary
+            fit.sums.add(tyre_life, lap[3])
+            fit.n_accepted += 1
+        fit.median.add(lap_time)
+        fit.apply_cut()
+        return i < fit.n_accepted
+
+    def remove_lap(self, driver, compound, stint, lap_number, tyre_life, lap_time):
+        """Takes back a lap added earlier, e.g. one deleted for track limits; the lap is found by its number."""
+        key = (self.session, driver, compound, stint)
+        if key not in self.stints:
+            raise ValueError(f"No laps for {key}")
+        fit = self.stints[key]
+        i = fit.index(lap_number)
+        stored_time, _, stored_tyre_life, corrected = fit.laps.pop(i)
+        if i < fit.n_accepted:
+            fit.sums.remove(stored_tyre_life, corrected)
+            fit.n_accepted -= 1
+        fit.median.remove(stored_time)
+        if not fit.median.n:
+            del self.stints[key]
+        else:
+            fit.apply_cut()
+
+    @staticmethod
+    def _usable(laps):
+        """Laps the degradation fits can use: no pit in/out laps, nothing missing."""
+        return laps.loc[laps['PitInTime'].isnull() & laps['PitOutTime'].isnull() & laps['LapTime'].notna()
+                        & laps['Compound'].notna() & laps['TyreLife'].notna()]
+
+    def add_laps(self, laps):
+        """Adds every usable lap of a feed update one by one."""
+        usable = self._usable(laps)
+        for row, lap_time in zip(usable.itertuples(index=False), usable['LapTime'].dt.total_seconds()):
+            self.add_lap(row.Driver, row.Compound, row.Stint, row.LapNumber, row.TyreLife, lap_time)
+
+    @classmethod
+    def from_laps(cls, laps, fuel_effect_per_lap=0.04, min_laps=MIN_STINT_LAPS, resolution=MEDIAN_RESOLUTION, session=None):
+        """Builds an estimator from a whole session at once, one batched update per stint."""
+        estimator = cls(fuel_effect_per_lap, min_laps, resolution, session)
+        usable = cls._usable(laps)
+        usable = usable.assign(LapTimeSeconds=usable['LapTime'].dt.total_seconds())
+        usable = usable.assign(CorrectedLapTime=usable['LapTimeSeconds'] + usable['LapNumber'] * fuel_effect_per_lap)
+        for key, stint_laps in usable.groupby(list(STINT_KEYS), sort=False):
+            fit = estimator._stint((session, *key))
+            fit.laps = sorted(zip(stint_laps['LapTimeSeconds'], stint_laps['LapNumber'], stint_laps['TyreLife'], stint_laps['CorrectedLapTime']))
+            for lap_time in stint_laps['LapTimeSeconds']:
+                fit.median.add(lap_time)
+            clean = stint_laps.loc[stint_laps['LapTimeSeconds'] < fit.median.median() * OUTLIER_THRESHOLD]
+            fit.sums.add(clean['TyreLife'], clean['CorrectedLapTime'])
+            fit.n_accepted = len(clean)
+        return estimator
+
+    def merge(self, other):
+        """Adds another estimator's laps into this one. Both must use the same fuel effect.
+
+        Stints keep their session, so only stints of the same session are pooled,
+        and those must not share laps.
+        """
+        if not np.isclose(other.fuel_effect_per_lap, self.fuel_effect_per_lap):
+            raise ValueError("Cannot merge fits made with different fuel effects")
+        for key, other_fit in other.stints.items():
+            if key in self.stints and self.stints[key].lap_numbers & other_fit.lap_numbers:
+                raise ValueError(f"Both estimators hold laps of stint {key}; merge disjoint laps only")
+        for key, other_fit in other.stints.items():
+            if key not in self.stints:
+                fit = self.stints[key] = _StintFit(self.resolution)
+                fit.sums.merge(other_fit.sums)
+                fit.median.merge(other_fit.median)
+                fit.laps, fit.n_accepted = list(other_fit.laps), other_fit.n_accepted
+                continue
+            # The pooled median sets a new cut, so re-sum the stint's accepted laps from scratch
+            fit = self.stints[key]
+            fit.median.merge(other_fit.median)
+            fit.laps = sorted(fit.laps + other_fit.laps)
+            fit.sums, fit.n_accepted = LeastSquaresSums(), 0
+            fit.apply_cut()
+        return self
+
+    def fits(self):
+        """Slope and intercept of every stint with at least min_laps clean laps."""
+        rows = [
+            {'Session': session, 'Driver': driver, 'Compound': compound, 'Stint': stint,
+             'Degradation': fit.sums.slope, 'Intercept': fit.sums.intercept, 'Laps': int(fit.sums.n)}
+            for (session, driver, compound, stint), fit in self.stints.items()
+            if fit.sums.n >= self.min_laps and np.isfinite(fit.sums.slope)
+        ]
+        return pd.DataFrame(rows, columns=['Session', *STINT_KEYS, 'Degradation', 'Intercept', 'Laps'])
+
+    def summary(self):
+        """Per-compound degradation averaged over stints, in the form StintEngine takes."""
+        return self.fits().groupby('Compound')['Degradation'].mean().reset_index()
@@ -0,0 +1,101 @@
+import functools
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+class StageProfiler:
+    """Records wall time, call counts and peak memory for named pipeline stages.
+
+    Stages can nest; a stage's time and peak memory include its sub-stages.
+    Memory is measured with tracemalloc, which slows Python allocations down,
+    so it is only switched on when track_memory is True.
+    """
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.stats = {}
+        self._stack = []
+        # Whether this profiler switched tracemalloc on, and so must switch it off again
+        self._started_tracing = False
+
+    def reset(self):
+        self.stats = {}
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name):
+        """Times the enclosed block as one call of the named stage."""
+        tracking = self.track_memory
+        if tracking and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if tracking:
+            current, peak = tracemalloc.get_traced_memory()
+            # Bank the parent's peak so far before resetting it for this stage
+            if self._stack:
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+        else:
+            current = 0
+        frame = {'name': name, 'start_memory': current, 'peak': current}
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            peak_memory = 0
+            if tracking and tracemalloc.is_tracing():
+                frame['peak'] = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                peak_memory = frame['peak'] - frame['start_memory']
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], frame['peak'])
+            self._record(name, elapsed, peak_memory)
+            # Tracing slows every allocation, so it stops with the outermost stage
+            if not self._stack and self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    def _record(self, name, elapsed, peak_memory):
+        stats = self.stats.setdefault(name, {'calls': 0, 'total_s': 0.0, 'max_s': 0.0, 'peak_memory_mb': 0.0})
+        stats['calls'] += 1
+        stats['total_s'] += elapsed
+        stats['max_s'] = max(stats['max_s'], elapsed)
+        stats['peak_memory_mb'] = max(stats['peak_memory_mb'], peak_memory / 2 ** 20)
+
+    def profiled(self, name=None):
+        """Decorator form of stage(); the stage name defaults to the function name."""
+        def decorator(func):
+            stage_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def to_frame(self):
+        """One row per stage, slowest first."""
+        columns = ['Stage', 'Calls', 'Total (s)', 'Mean (s)', 'Max (s)', 'Peak Memory (MB)']
+        rows = [
+            [name, s['calls'], s['total_s'], s['total_s'] / s['calls'], s['max_s'], s['peak_memory_mb']]
+            for name, s in self.stats.items()
+        ]
+        return pd.DataFrame(rows, columns=columns).sort_values(by='Total (s)', ascending=False).reset_index(drop=True)
+
+    def to_dict(self):
+        return {'track_memory': self.track_memory, 'stages': {name: dict(s) for name, s in self.stats.items()}}
+
+    def to_json(self, path=None):
+        """Returns the recorded stages as JSON, also writing them to path when given."""
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+from strategy_core.stint_engine import MISSING_COMPOUND_TIME
+from strategy_core.strategy_array import StrategyArray
+
+# Track status codes used in the (trial x lap) status matrix
+GREEN, VSC, SC = 0, 1, 2
+
+# Chance that a Safety Car / Virtual Safety Car is deployed on any given lap
+SC_PROBABILITY_PER_LAP = 0.015
+VSC_PROBABILITY_PER_LAP = 0.01
+# Inclusive ranges for how many laps a neutralisation lasts
+SC_LAPS = (3, 5)
+VSC_LAPS = (1, 3)
+# Neutralised lap time as a multiple of the base lap time
+SC_LAP_FACTOR = 1.4
+VSC_LAP_FACTOR = 1.3
+# Share of the normal pit loss paid when pitting under SC / VSC
+SC_PIT_LOSS_FACTOR = 0.5
+VSC_PIT_LOSS_FACTOR = 0.6
+
+
+def _as_pit_grid(pit_laps):
+    """Coerces pit laps to a (strategy x stop) int array; a 1-D array is one-stop candidates."""
+    pit_laps = np.asarray(pit_laps, dtype=int)
+    return pit_laps[:, None] if pit_laps.ndim == 1 else pit_laps
+
+
+def strategy_lap_times(engine, compound_sequence, pit_laps, total_laps):
+    """Predicted lap times (strategy x lap) for one compound order and a grid of pit laps.
+
+    pit_laps has one row per strategy and one column per stop. A stint on a
+    compound with no degradation data costs the usual 999999 s in total, so each
+    row sums to the same total as StintEngine.strategy_time.
+    """
+    pit_laps = _as_pit_grid(pit_laps)
+    laps = np.arange(1, total_laps + 1)
+
+    # Which stint each lap belongs to, and the lap its tyres were fitted after
+    stint_index = (laps[None, :, None] > pit_laps[:, None, :]).sum(axis=2)
+    stint_start = np.concatenate([np.zeros((len(pit_laps), 1), dtype=int), pit_laps], axis=1)
+    previous_pit = np.take_along_axis(stint_start, stint_index, axis=1)
+    tyre_life = laps[None, :] - previous_pit
+
+    lap_times = np.tile(engine.base_lap_time - laps * engine.fuel_effect_per_lap, (len(pit_laps), 1))
+    for i, compound in enumerate(compound_sequence):
+        stint_laps = stint_index == i
+        if compound in engine.rates:
+            lap_times[stint_laps] += engine.tyre_effect(compound, tyre_life[stint_laps])
+        else:
+            lap_times[stint_laps] = 0.0
+            lap_times[stint_laps & (tyre_life == 1)] = MISSING_COMPOUND_TIME
+    return lap_times
+
+
+def pit_lap_mask(pit_laps, total_laps):
+    """Marks the laps (strategy x lap) at the end of which each strategy pits."""
+    pit_laps = _as_pit_grid(pit_laps)
+    mask = np.zeros((len(pit_laps), total_laps))
+    rows = np.repeat(np.arange(len(pit_laps)), pit_laps.shape[1])
+    mask[rows, pit_laps.ravel() - 1] = 1.0
+    return mask
+
+
+def _neutralised_laps(rng, n_trials, total_laps, probability, lap_range):
+    """Samples which laps are covered by a neutralisation of one kind."""
+    laps = np.arange(total_laps)
+    starts = rng.random((n_trials, total_laps)) < probability
+    durations = rng.integers(lap_range[0], lap_range[1] + 1, size=(n_trials, total_laps))
+    # Last lap covered by each deployment, carried forward to find every covered lap
+    last_covered = np.where(starts, laps + durations - 1, -1)
+    return np.maximum.accumulate(last_covered, axis=1) >= laps
+
+
+def sample_track_status(n_trials, total_laps, sc_probability=SC_PROBABILITY_PER_LAP, vsc_probability=VSC_PROBABILITY_PER_LAP,
+                        sc_laps=SC_LAPS, vsc_laps=VSC_LAPS, seed=None):
+    """Samples a (trial x lap) matrix of GREEN / VSC / SC track status."""
+    rng = np.random.default_rng(seed)
+    status = np.full((n_trials, total_laps), GREEN, dtype=np.int8)
+    status[_neutralised_laps(rng, n_trials, total_laps, vsc_probability, vsc_laps)] = VSC
+    # A Safety Car takes precedence over a VSC on the same lap
+    status[_neutralised_laps(rng, n_trials, total_laps, sc_probability, sc_laps)] = SC
+    return status
+
+
+def simulate_race_times(lap_times, pit_mask, status, base_lap_time, pit_stop_time_loss,
+                        sc_lap_factor=SC_LAP_FACTOR, vsc_lap_factor=VSC_LAP_FACTOR,
+                        sc_pit_loss_factor=SC_PIT_LOSS_FACTOR, vsc_pit_loss_factor=VSC_PIT_LOSS_FACTOR):
+    """Race time of every strategy in every trial, as a (trial x strategy) array.
+
+    Neutralised laps run at the slower of the car's own pace and the SC/VSC pace,
+    and a stop made on a neutralised lap only costs part of the normal pit loss.
+    """
+    green = (status == GREEN).astype(float)
+    vsc = (status == VSC).astype(float)
+    sc = (status == SC).astype(float)
+    race_times = (
+        green @ lap_times.T
+        + vsc @ np.maximum(lap_times, base_lap_time * vsc_lap_factor).T
+        + sc @ np.maximum(lap_times, base_lap_time * sc_lap_factor).T
+    )
+
+    pit_loss_factor = np.array([1.0, vsc_pit_loss_factor, sc_pit_loss_factor])[status]
+    return race_times + pit_stop_time_loss * (pit_loss_factor @ pit_mask.T)
+
+
+def summarize_race_times(race_times, labels):
+    """Mean, spread, percentiles and win chances for each strategy's race-time distribution."""
+    fastest = np.argmin(race_times, axis=1)
+    best_on_average = int(np.argmin(race_times.mean(axis=0)))
+    summary = pd.DataFrame({
+        'Strategy': labels,
+        'Mean (s)': race_times.mean(axis=0),
+        'Std (s)': race_times.std(axis=0),
+        'P5 (s)': np.percentile(race_times, 5, axis=0),
+        'P50 (s)': np.percentile(race_times, 50, axis=0),
+        'P95 (s)': np.percentile(race_times, 95, axis=0),
+        'P(Fastest)': np.bincount(fastest, minlength=race_times.shape[1]) / len(race_times),
+        'P(Beats Best Mean)': (race_times < race_times[:, [best_on_average]]).mean(axis=0)
+    })
+    return summary.sort_values(by='Mean (s)').reset_index(drop=True)
+
+
+def win_probabilities(race_times, labels):
+    """Probability that the row strategy finishes ahead of the column strategy."""
+    probabilities = np.array([(race_times[:, [i]] < race_times).mean(axis=0) for i in range(race_times.shape[1])])
+    return pd.DataFrame(probabilities, index=labels, columns=labels)
+
+
+def monte_carlo_strategies(engine, strategies, total_laps, pit_stop_time_loss, n_trials=10000, seed=None, status=None, **race_options):
+    """Scores a StrategyArray or a list of (compound_sequence, pit_laps) strategies under random SC/VSC periods.
+
+    Every strategy sees the same sampled races, so the comparisons are paired. Pass
+    a status matrix from sample_track_status to change the deployment model.
+    Returns (summary, win_matrix, race_times).
+    """
+    if isinstance(strategies, StrategyArray):
+        strategies = strategies.sequences()
+    if status is None:
+        status = sample_track_status(n_trials, total_laps, seed=seed)
+    lap_times = np.vstack([
+        strategy_lap_times(engine, sequence, [pit_laps], total_laps) for sequence, pit_laps in strategies
+    ])
+    pit_mask = np.vstack([pit_lap_mask([pit_laps], total_laps) for _, pit_laps in strategies])
+    labels = [f"{'-'.join(sequence)} ({', '.join(str(lap) for lap in pit_laps)})" for sequence, pit_laps in strategies]
+
+    race_times = simulate_race_times(lap_times, pit_mask, status, engine.base_lap_time, pit_stop_time_loss, **race_options)
+    return summarize_race_times(race_times, labels), win_probabilities(race_times, labels), race_times
+
+
+def monte_carlo_grid(engine, compound_sequence, pit_laps, total_laps, pit_stop_time_loss, n_trials=10000, seed=None, status=None, **race_options):
+    """Scores a whole pit-lap grid for one compound order, e.g. every find_best_two_stop candidate.
+
+    Returns the (trial x candidate) race-time array; columns follow the rows of pit_laps.
+    """
+    if status is None:
+        status = sample_track_status(n_trials, total_laps, seed=seed)
+    pit_laps = _as_pit_grid(pit_laps)
+    lap_times = strategy_lap_times(engine, compound_sequence, pit_laps, total_laps)
+    return simulate_race_times(lap_times, pit_lap_mask(pit_laps, total_laps), status,
+                               engine.base_lap_time, pit_stop_time_loss, **race_options)
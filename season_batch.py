@@ -0,0 +1,136 @@
+"""Runs the strategy pipeline for every event of a season in parallel and writes one results table.
+
+Each event's laps come from the lap store (fetched through fastf1 on a miss), keyed
+by event_key so sessions ingested by ingest_season.py are reused. The
+degradation fit and the 1- and 2-stop searches run in a process pool whose
+workers are replaced after a few events, so memory per worker stays bounded.
+
+Example:
+    python season_batch.py 2023 --session FP2 --workers 4 --output season_2023.csv
+    python season_batch.py 2023 --events Bahrain Monaco --output briefs.parquet
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from ingest_season import season_events
+from lap_store import DEFAULT_STORE_DIR, LapStore, event_key, load_laps
+from strategy_core.degradation_fit import clean_stint_laps, fit_degradation_batch, fit_groups
+from strategy_core.stint_engine import StintEngine
+from strategy_core.strategy_search import DRY_COMPOUNDS, compound_sequences, search_one_stop, search_two_stop
+
+# Events a worker process analyses before it is replaced, which caps memory growth
+TASKS_PER_WORKER = 4
+
+
+def search_event(engine, total_laps, pit_stop_time_loss):
+    """Best plan for every 1- and 2-stop compound order the app compares, as one table."""
+    compounds = [c for c in DRY_COMPOUNDS if c in engine.rates]
+    results = [search_one_stop(list(sequence), total_laps, engine, pit_stop_time_loss) for sequence in compound_sequences(compounds, 1)]
+    results += [search_two_stop(list(sequence), total_laps, engine, pit_stop_time_loss) for sequence in compound_sequences(compounds, 2)]
+    results = [r for r in results if r is not None]
+    if not results:
+        raise ValueError("Fewer than two dry compounds have degradation data")
+    return pd.DataFrame(results).sort_values(by='Total Time (s)').reset_index(drop=True)
+
+
+def analyse_event(year, event, session, store_dir=DEFAULT_STORE_DIR, pit_stop_time_loss=22.0, fuel_effect_per_lap=0.04):
+    """Worker: degradation fit and best 1- and 2-stop strategies for one event; returns one result row.
+
+    The race distance comes from the race session, and the base lap time is the
+    median fuel-corrected pace on new tyres in the analysed session.
+    """
+    start = time.perf_counter()
+    store = LapStore(store_dir)
+    laps = load_laps(year, event, session, store)
+    race_laps = laps if session == 'R' else load_laps(year, event, 'R', store)
+    total_laps = int(race_laps['LapNumber'].max())
+
+    clean_laps = clean_stint_laps(laps, fuel_effect_per_lap)
+    reliable_summary = fit_degradation_batch(laps, fuel_effect_per_lap, clean_laps=clean_laps)
+    if reliable_summary.empty:
+        raise ValueError("No reliable stints")
+    degradation_summary = reliable_summary.groupby('Compound')['Degradation'].mean().reset_index()
+    base_lap_time = float(fit_groups(clean_laps)['Intercept'].median())
+    engine = StintEngine(degradation_summary, base_lap_time, fuel_effect_per_lap)
+
+    results = search_event(engine, total_laps, pit_stop_time_loss)
+    one_stops = results.loc[results['Pit Lap 2'].isna()]
+    two_stops = results.loc[results['Pit Lap 2'].notna()]
+    best = results.iloc[0]
+    row = {
+        'Year': year, 'Event': event, 'Event Key': event_key(event), 'Session': session, 'Status': 'ok',
+        'Total Laps': total_laps,
+        'Base Lap Time (s)': base_lap_time,
+        **{f'{c} Degradation (s/lap)': engine.rates.get(c) for c in DRY_COMPOUNDS},
+        'Best Strategy': best['Strategy'],
+        'Pit Lap 1': best['Pit Lap 1'],
+        'Pit Lap 2': best['Pit Lap 2'],
+        'Total Time (s)': best['Total Time (s)'],
+        'Best One-Stop': None if one_stops.empty else one_stops['Strategy'].iloc[0],
+        'One-Stop Time (s)': None if one_stops.empty else one_stops['Total Time (s)'].iloc[0],
+        'Best Two-Stop': None if two_stops.empty else two_stops['Strategy'].iloc[0],
+        'Two-Stop Time (s)': None if two_stops.empty else two_stops['Total Time (s)'].iloc[0],
+    }
+    row['Runtime (s)'] = time.perf_counter() - start
+    return row
+
+
+def run_season(year, events, session='R', store_dir=DEFAULT_STORE_DIR, workers=4, pit_stop_time_loss=22.0,
+               fuel_effect_per_lap=0.04, tasks_per_worker=TASKS_PER_WORKER):
+    """Analyses every event in a process pool; returns one row per event in calendar order.
+
+    Events are matched to the lap store by event_key, so fastf1 names from
+    season_events and short names like 'Bahrain' reuse the same stored sessions.
+    Spellings of an event already in the list are dropped, which also keeps two
+    workers from writing the same session file.
+    """
+    unique_events = {}
+    for event in events:
+        unique_events.setdefault(event_key(event), event)
+    events = list(unique_events.values())
+    rows = {}
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=tasks_per_worker) as pool:
+        futures = {
+            pool.submit(analyse_event, year, event, session, store_dir, pit_stop_time_loss, fuel_effect_per_lap): event
+            for event in events
+        }
+        for future in as_completed(futures):
+            event = futures[future]
+            try:
+                rows[event] = future.result()
+            except Exception as e:
+                # One event without usable data should not stop the season
+                rows[event] = {'Year': year, 'Event': event, 'Event Key': event_key(event), 'Session': session, 'Status': f'failed: {e}'}
+            print(f"{year} {event} {session}: {rows[event]['Status']}")
+    return pd.DataFrame([rows[event] for event in events])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the strategy pipeline for a whole season.")
+    parser.add_argument('year', type=int)
+    parser.add_argument('--events', nargs='+', help="Event names (default: every event of the season)")
+    parser.add_argument('--session', default='R', help="Session whose laps the degradation is fitted on")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help="Lap store directory")
+    parser.add_argument('--workers', type=int, default=4, help="Number of events analysed in parallel")
+    parser.add_argument('--pit-loss', type=float, default=22.0, help="Pit stop time loss (s)")
+    parser.add_argument('--fuel', type=float, default=0.04, help="Fuel effect (s/lap)")
+    parser.add_argument('--output', default='season_results.csv', help="Results table (.csv or .parquet)")
+    args = parser.parse_args(argv)
+
+    events = args.events or season_events(args.year)
+    start = time.perf_counter()
+    results = run_season(args.year, events, args.session, args.store, args.workers, args.pit_loss, args.fuel)
+    if args.output.endswith('.parquet'):
+        results.to_parquet(args.output, index=False)
+    else:
+        results.to_csv(args.output, index=False)
+
+    succeeded = int((results['Status'] == 'ok').sum())
+    print(f"Analysed {succeeded} of {len(results)} event(s) in {time.perf_counter() - start:.1f} s; wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
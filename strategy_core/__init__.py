@@ -0,0 +1,48 @@
+"""Headless strategy model: degradation fits, stint and race simulation, and strategy search.
+
+Nothing here imports Streamlit, fastf1 or matplotlib, so scripts, services and
+workers can use the model without the app. Submodules are loaded on first use of
+one of their names, which keeps `import strategy_core` itself free. Only the functions
+that return tables import pandas, so scoring plans with StintEngine needs numpy alone.
+
+Example:
+    from strategy_core import find_best_one_stop
+    find_best_one_stop(['SOFT', 'HARD'], 57, degradation_summary, 99.5, 0.04, 22.0)
+"""
+import importlib
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    'calculate_degradation': 'degradation_fit',
+    'clean_stint_laps': 'degradation_fit',
+    'fit_degradation_batch': 'degradation_fit',
+    'fit_groups': 'degradation_fit',
+    'StintEngine': 'stint_engine',
+    'StrategyArray': 'strategy_array',
+    'simulate_stint': 'strategy_search',
+    'simulate_strategy': 'strategy_search',
+    'search_one_stop': 'strategy_search',
+    'search_two_stop': 'strategy_search',
+    'find_best_one_stop': 'strategy_search',
+    'find_best_two_stop': 'strategy_search',
+    'top_k_strategies': 'strategy_search',
+    'optimize_strategy': 'strategy_search',
+    'optimize_by_stop_count': 'strategy_search',
+    'optimize_remaining_race': 'strategy_search',
+    'fit_tyre_models': 'tyre_models',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,100 @@
+import numpy as np
+
+# A stint needs this many clean laps to be considered reliable
+MIN_STINT_LAPS = 10
+# Laps slower than this multiple of the stint median are treated as outliers
+OUTLIER_THRESHOLD = 1.07
+
+
+def calculate_degradation(laps, driver, compound, fuel_effect_per_lap=0.04, min_laps=MIN_STINT_LAPS,
+                          outlier_threshold=OUTLIER_THRESHOLD):
+    """Calculates tyre degradation, including fuel correction and outlier removal.
+
+    outlier_threshold=None keeps every lap; None is returned with fewer than min_laps laps.
+    """
+    stint_laps = laps.loc[(laps['Driver'] == driver) & (laps['Compound'] == compound)].copy()
+    stint_laps = stint_laps.loc[stint_laps['PitInTime'].isnull() & stint_laps['PitOutTime'].isnull()].copy()
+
+    if len(stint_laps) < min_laps:
+        return None
+
+    stint_laps['LapTimeSeconds'] = stint_laps['LapTime'].dt.total_seconds()
+    if outlier_threshold is not None:
+        median_lap_time = stint_laps['LapTimeSeconds'].median()
+        stint_laps = stint_laps.loc[stint_laps['LapTimeSeconds'] < median_lap_time * outlier_threshold].copy()
+
+    if len(stint_laps) < min_laps:
+        return None
+
+    fuel_correction = stint_laps['LapNumber'] * fuel_effect_per_lap
+    stint_laps['CorrectedLapTime'] = stint_laps['LapTimeSeconds'] + fuel_correction
+
+    x = stint_laps['TyreLife']
+    y = stint_laps['CorrectedLapTime']
+    coeffs = np.polyfit(x, y, 1)
+
+    return coeffs[0]
+
+
+def clean_stint_laps(laps, fuel_effect_per_lap=0.04, by=('Driver', 'Compound'), min_laps=MIN_STINT_LAPS):
+    """Applies the pit-lap filter, the 107% median cut and fuel correction to every group at once.
+
+    Returns the surviving laps with LapTimeSeconds and CorrectedLapTime columns,
+    dropping groups with fewer than min_laps laps before or after the outlier cut.
+    """
+    keys = list(by)
+    stint_laps = laps.loc[laps['PitInTime'].isnull() & laps['PitOutTime'].isnull(), keys + ['LapTime', 'LapNumber', 'TyreLife']]
+    stint_laps = stint_laps.assign(LapTimeSeconds=stint_laps['LapTime'].dt.total_seconds())
+
+    groups = stint_laps.groupby(keys)
+    enough_laps = groups['LapNumber'].transform('size') >= min_laps
+    median_lap_time = groups['LapTimeSeconds'].transform('median')
+    stint_laps = stint_laps.loc[enough_laps & (stint_laps['LapTimeSeconds'] < median_lap_time * OUTLIER_THRESHOLD)]
+
+    # Same length check again once the outliers are gone
+    stint_laps = stint_laps.loc[stint_laps.groupby(keys)['LapNumber'].transform('size') >= min_laps]
+    return stint_laps.assign(CorrectedLapTime=stint_laps['LapTimeSeconds'] + stint_laps['LapNumber'] * fuel_effect_per_lap)
+
+
+def fit_groups(clean_laps, by=('Driver', 'Compound'), y='CorrectedLapTime'):
+    """Least-squares slope and intercept of y against TyreLife for every group in one pass."""
+    # Only the table built here needs pandas itself; the callers already hold DataFrames
+    import pandas as pd
+
+    keys = list(by)
+    groups = clean_laps.groupby(keys)
+    # Centre each group first, which is better conditioned than the raw normal equations
+    x_centred = clean_laps['TyreLife'] - groups['TyreLife'].transform('mean')
+    y_centred = clean_laps[y] - groups[y].transform('mean')
+    sums = pd.DataFrame({
+        'sxy': x_centred * y_centred,
+        'sxx': x_centred * x_centred,
+        'x': clean_laps['TyreLife'],
+        'y': clean_laps[y]
+    }).groupby([clean_laps[k] for k in keys]).agg(
+        sxy=('sxy', 'sum'), sxx=('sxx', 'sum'), x=('x', 'mean'), y=('y', 'mean'), Laps=('x', 'size')
+    )
+    slope = sums['sxy'] / sums['sxx']
+    return pd.DataFrame({
+        'Degradation': slope,
+        'Intercept': sums['y'] - slope * sums['x'],
+        'Laps': sums['Laps']
+    }).reset_index()
+
+
+def fit_degradation_batch(laps, fuel_effect_per_lap=0.04, min_laps=MIN_STINT_LAPS, clean_laps=None):
+    """Fits every (driver, compound) degradation slope in one grouped pass.
+
+    Returns the same Driver/Compound/Degradation table as calling
+    calculate_degradation for every driver and compound, in the same order.
+    Pass the output of clean_stint_laps as clean_laps to skip cleaning again.
+    """
+    if clean_laps is None:
+        clean_laps = clean_stint_laps(laps, fuel_effect_per_lap, min_laps=min_laps)
+    fits = fit_groups(clean_laps)
+
+    # Driver-major order with compounds in order of appearance, like the nested loop
+    driver_order = {driver: i for i, driver in enumerate(laps['Driver'].unique())}
+    compound_order = {compound: i for i, compound in enumerate(laps['Compound'].unique())}
+    order = np.lexsort((fits['Compound'].map(compound_order), fits['Driver'].map(driver_order)))
+    return fits.iloc[order][['Driver', 'Compound', 'Degradation']].reset_index(drop=True)
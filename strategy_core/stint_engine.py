@@ -0,0 +1,99 @@
+import threading
+
+import numpy as np
+
+from .tyre_models import compile_lap_costs
+
+# Time returned for a stint on a compound with no degradation data
+MISSING_COMPOUND_TIME = 999999
+
+
+class StintEngine:
+    """Closed-form stint times for linear tyre degradation and linear fuel burn.
+
+    Each predicted lap is base_lap_time + tyre_life * rate - lap_in_race * fuel_effect,
+    so a whole stint is an arithmetic series and can be summed in O(1).
+
+    tyre_models optionally maps compounds to non-linear curves from tyre_models.py.
+    Those compounds are priced from cumulative lap-cost arrays instead, which keeps
+    every stint an O(1) lookup.
+    """
+
+    def __init__(self, degradation_summary, base_lap_time, fuel_effect_per_lap, tyre_models=None):
+        self.base_lap_time = base_lap_time
+        self.fuel_effect_per_lap = fuel_effect_per_lap
+        self.tyre_models = tyre_models or {}
+
+        # Build the compound -> rate table once (first row wins, like .iloc[0])
+        self.rates = {}
+        for compound, rate in zip(degradation_summary['Compound'], degradation_summary['Degradation']):
+            if compound not in self.rates:
+                self.rates[compound] = float(rate)
+
+        # Prefix sums of the per-lap effects as one (laps covered, tyre costs, fuel costs) tuple,
+        # grown on demand by stint_times(). Engines are shared across threads (strategy_service.py),
+        # so growth is locked and the tuple is swapped in whole.
+        self._tables = (-1, {}, None)
+        self._tables_lock = threading.Lock()
+
+    def stint_time(self, start_lap, stint_length, compound):
+        """Calculates the total time for a single race stint."""
+        if compound not in self.rates:
+            return MISSING_COMPOUND_TIME
+        if compound in self.tyre_models:
+            return self.stint_times(start_lap, stint_length, compound)
+
+        rate = self.rates[compound]
+        # Works for scalars and NumPy arrays of start laps / stint lengths
+        n = np.maximum(stint_length, 0)
+        tyre_effect = rate * n * (n + 1) / 2
+        fuel_effect = self.fuel_effect_per_lap * (n * start_lap + n * (n - 1) / 2)
+        return n * self.base_lap_time + tyre_effect - fuel_effect
+
+    def _ensure_tables(self, max_laps):
+        """Returns (tyre costs, fuel costs): cumulative tyre-age and race-lap cost arrays covering max_laps."""
+        tables = self._tables
+        if max_laps > tables[0]:
+            with self._tables_lock:
+                tables = self._tables
+                if max_laps > tables[0]:
+                    laps = np.arange(max_laps + 1)
+                    # tyre_costs[c][n] = sum of tyre effect for tyre life 1..n
+                    tyre_costs = {
+                        compound: compile_lap_costs(self.tyre_models[compound], max_laps) if compound in self.tyre_models else np.cumsum(laps * rate)
+                        for compound, rate in self.rates.items()
+                    }
+                    # fuel_costs[n] = sum of fuel effect for race laps 1..n
+                    fuel_costs = np.cumsum(laps * self.fuel_effect_per_lap)
+                    tables = self._tables = (max_laps, tyre_costs, fuel_costs)
+        return tables[1], tables[2]
+
+    def tyre_effect(self, compound, tyre_life):
+        """Seconds lost to tyre wear at the given tyre life on a compound."""
+        if compound in self.tyre_models:
+            return self.tyre_models[compound].degradation(tyre_life)
+        return np.asarray(tyre_life) * self.rates[compound]
+
+    def stint_times(self, start_laps, stint_lengths, compound):
+        """Batched stint times for arrays of start laps and stint lengths on one compound."""
+        start_laps = np.asarray(start_laps)
+        stint_lengths = np.maximum(np.asarray(stint_lengths), 0)
+        shape = np.broadcast(start_laps, stint_lengths).shape
+        if compound not in self.rates:
+            return np.full(shape, MISSING_COMPOUND_TIME, dtype=float)
+
+        end_laps = start_laps + stint_lengths - 1
+        tyre_costs, fuel_costs = self._ensure_tables(int(max(np.max(end_laps, initial=0), np.max(start_laps, initial=0))))
+        tyre_effect = tyre_costs[compound][stint_lengths]
+        fuel_effect = fuel_costs[end_laps] - fuel_costs[start_laps - 1]
+        return stint_lengths * self.base_lap_time + tyre_effect - fuel_effect
+
+    def strategy_time(self, strategy, pit_stop_time_loss):
+        """Calculates the total race time for a list of {'Compound', 'StintLength'} stints."""
+        total_race_time = 0
+        start_lap = 1
+        for stint in strategy:
+            total_race_time += self.stint_time(start_lap, stint['StintLength'], stint['Compound'])
+            start_lap += stint['StintLength']
+        num_pit_stops = len(strategy) - 1
+        return total_race_time + num_pit_stops * pit_stop_time_loss
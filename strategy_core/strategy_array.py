@@ -0,0 +1,177 @@
+import numpy as np
+
+# Compound codes stored in a strategy record; -1 marks an unused stint slot
+COMPOUNDS = ('SOFT', 'MEDIUM', 'HARD', 'INTERMEDIATE', 'WET')
+COMPOUND_CODES = {compound: code for code, compound in enumerate(COMPOUNDS)}
+MAX_STOPS = 5
+
+# One packed 25-byte record per strategy, so millions of candidates fit in memory
+STRATEGY_DTYPE = np.dtype([
+    ('compounds', np.int8, (MAX_STOPS + 1,)),
+    ('pit_laps', np.int16, (MAX_STOPS,)),
+    ('stops', np.int8),
+    ('total_time', np.float64)
+])
+
+
+def encode_compounds(sequence):
+    """Compound names to a padded row of codes."""
+    if len(sequence) > MAX_STOPS + 1:
+        raise ValueError(f"At most {MAX_STOPS} stops are supported, got {len(sequence) - 1}")
+    try:
+        codes = [COMPOUND_CODES[compound] for compound in sequence]
+    except KeyError as e:
+        raise ValueError(f"Unknown compound {e.args[0]!r}") from None
+    return codes + [-1] * (MAX_STOPS + 1 - len(codes))
+
+
+class StrategyArray:
+    """A batch of strategies as one structured NumPy array.
+
+    The searches and simulators work on these arrays directly. to_frame() and
+    to_stints() convert back to the DataFrame / list-of-dicts forms at the UI boundary.
+    """
+
+    def __init__(self, records=None):
+        self.records = np.zeros(0, dtype=STRATEGY_DTYPE) if records is None else records
+
+    @classmethod
+    def from_grid(cls, compound_sequence, pit_laps, total_times=None):
+        """Every row of a (strategy x stop) pit-lap grid run on one compound order."""
+        pit_laps = np.asarray(pit_laps, dtype=np.int16)
+        if pit_laps.ndim == 1:
+            pit_laps = pit_laps[:, None]
+        records = np.zeros(len(pit_laps), dtype=STRATEGY_DTYPE)
+        records['compounds'] = encode_compounds(list(compound_sequence))
+        records['pit_laps'][:, :pit_laps.shape[1]] = pit_laps
+        records['stops'] = len(compound_sequence) - 1
+        records['total_time'] = np.nan if total_times is None else total_times
+        return cls(records)
+
+    @classmethod
+    def from_sequences(cls, strategies):
+        """From (compound_sequence, pit_laps) or (compound_sequence, pit_laps, total_time) tuples."""
+        records = np.zeros(len(strategies), dtype=STRATEGY_DTYPE)
+        records['total_time'] = np.nan
+        for i, (sequence, pit_laps, *total_time) in enumerate(strategies):
+            records['compounds'][i] = encode_compounds(list(sequence))
+            records['pit_laps'][i, :len(pit_laps)] = pit_laps
+            records['stops'][i] = len(sequence) - 1
+            if total_time:
+                records['total_time'][i] = total_time[0]
+        return cls(records)
+
+    @classmethod
+    def from_stints(cls, strategies):
+        """From lists of {'Compound': ..., 'StintLength': ...} stints."""
+        return cls.from_sequences([
+            ([stint['Compound'] for stint in strategy], list(np.cumsum([stint['StintLength'] for stint in strategy[:-1]])))
+            for strategy in strategies
+        ])
+
+    @classmethod
+    def from_frame(cls, frame):
+        """From a results table with Strategy and 'Pit Lap N' columns (and optionally Total Time (s))."""
+        # pandas is only imported by the table conversions, so the records alone load with numpy
+        import pandas as pd
+
+        pit_lap_columns = [c for c in frame.columns if c.startswith('Pit Lap')]
+        has_times = 'Total Time (s)' in frame.columns
+        return cls.from_sequences([
+            (
+                row['Strategy'].split('-'),
+                [int(row[c]) for c in pit_lap_columns if not pd.isna(row[c])],
+                *([row['Total Time (s)']] if has_times else [])
+            )
+            for _, row in frame.iterrows()
+        ])
+
+    @classmethod
+    def concat(cls, arrays):
+        return cls(np.concatenate([array.records for array in arrays]))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return StrategyArray(np.atleast_1d(self.records[index]))
+
+    @property
+    def total_times(self):
+        return self.records['total_time']
+
+    @property
+    def nbytes(self):
+        return self.records.nbytes
+
+    def sequence(self, i):
+        """Compound names of strategy i."""
+        record = self.records[i]
+        return [COMPOUNDS[code] for code in record['compounds'][:record['stops'] + 1]]
+
+    def pit_laps(self, i):
+        record = self.records[i]
+        return [int(lap) for lap in record['pit_laps'][:record['stops']]]
+
+    def sequences(self):
+        """(compound_sequence, pit_laps) pairs, the form the safety-car simulator takes."""
+        return [(self.sequence(i), self.pit_laps(i)) for i in range(len(self))]
+
+    def labels(self):
+        return ['-'.join(self.sequence(i)) for i in range(len(self))]
+
+    def stint_bounds(self, total_laps):
+        """Start lap and length of every stint slot, as two (strategy x MAX_STOPS + 1) arrays.
+
+        Unused slots get length 0.
+        """
+        pit_laps = self.records['pit_laps'].astype(int)
+        unused = np.arange(MAX_STOPS)[None, :] >= self.records['stops'][:, None]
+        pit_laps[unused] = total_laps
+        bounds = np.concatenate([np.zeros((len(self), 1), dtype=int), pit_laps, np.full((len(self), 1), total_laps)], axis=1)
+        return bounds[:, :-1] + 1, np.diff(bounds, axis=1)
+
+    def evaluate(self, engine, total_laps, pit_stop_time_loss):
+        """Scores every strategy with a StintEngine, one batched call per (stint slot, compound)."""
+        start_laps, stint_lengths = self.stint_bounds(total_laps)
+        total_times = self.records['stops'] * float(pit_stop_time_loss)
+        for slot in range(MAX_STOPS + 1):
+            codes = self.records['compounds'][:, slot]
+            for code in np.unique(codes[codes >= 0]):
+                rows = codes == code
+                total_times[rows] += engine.stint_times(start_laps[rows, slot], stint_lengths[rows, slot], COMPOUNDS[code])
+        self.records['total_time'] = total_times
+        return self
+
+    def sort(self):
+        """Fastest first; ties keep their original order."""
+        return StrategyArray(self.records[np.argsort(self.records['total_time'], kind='stable')])
+
+    def unique(self):
+        """Drops repeated (compounds, pit laps) plans, keeping the first of each."""
+        keys = np.concatenate([self.records['compounds'].astype(np.int16), self.records['pit_laps']], axis=1)
+        _, first = np.unique(keys, axis=0, return_index=True)
+        return StrategyArray(self.records[np.sort(first)])
+
+    def to_stints(self, i, total_laps):
+        """Strategy i as the list of {'Compound', 'StintLength'} dicts simulate_strategy takes."""
+        _, stint_lengths = self.stint_bounds(total_laps)
+        return [
+            {'Compound': compound, 'StintLength': int(length)}
+            for compound, length in zip(self.sequence(i), stint_lengths[i])
+        ]
+
+    def to_frame(self, max_stops=None):
+        """The Strategy / Total Time (s) / Pit Lap N table the app displays.
+
+        There is one Pit Lap column per stop of the longest strategy, or max_stops columns if given.
+        """
+        import pandas as pd
+
+        if max_stops is None:
+            max_stops = int(self.records['stops'].max(initial=0))
+        frame = pd.DataFrame({'Strategy': self.labels(), 'Total Time (s)': self.records['total_time']})
+        for stop in range(max_stops):
+            pit_lap = pd.Series(self.records['pit_laps'][:, stop], dtype='Int64')
+            frame[f'Pit Lap {stop + 1}'] = pit_lap.where(self.records['stops'] > stop)
+        return frame
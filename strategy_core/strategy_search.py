@@ -0,0 +1,408 @@
+import heapq
+import itertools
+
+import numpy as np
+
+from .stint_engine import StintEngine
+from .strategy_array import StrategyArray
+
+# Pit windows used by the one-stop and two-stop searches
+ONE_STOP_WINDOW = (12, 35)
+TWO_STOP_WINDOW = (10, 25)
+MIN_STINT_LENGTH = 8
+
+# Compounds that count towards the two-dry-compound rule, and those that waive it
+DRY_COMPOUNDS = ('SOFT', 'MEDIUM', 'HARD')
+WET_COMPOUNDS = ('INTERMEDIATE', 'WET')
+
+
+def one_stop_grid():
+    """Returns the candidate pit laps searched by the one-stop search."""
+    pit_window_start, pit_window_end = ONE_STOP_WINDOW
+    return np.arange(pit_window_start, pit_window_end + 1)
+
+
+def two_stop_grid(total_laps):
+    """Returns (pit_lap_1, pit_lap_2) arrays in the same order as the nested-loop search."""
+    pit_window_1_start, pit_window_1_end = TWO_STOP_WINDOW
+    pit_lap_1, pit_lap_2 = np.meshgrid(
+        np.arange(pit_window_1_start, pit_window_1_end + 1),
+        np.arange(pit_window_1_start + MIN_STINT_LENGTH, total_laps - MIN_STINT_LENGTH + 1),
+        indexing='ij'
+    )
+    valid = pit_lap_2 >= pit_lap_1 + MIN_STINT_LENGTH
+    return pit_lap_1[valid], pit_lap_2[valid]
+
+
+def _best_row(strategy_name, total_times, pit_lap_1, pit_lap_2=None):
+    """Builds the same result row the loop-based searches return via idxmin."""
+    # pandas is only imported by the functions that build tables, so scoring plans needs numpy alone
+    import pandas as pd
+
+    if len(total_times) == 0:
+        return None
+    best = int(np.argmin(total_times))
+    return pd.Series({
+        'Strategy': strategy_name,
+        'Total Time (s)': float(total_times[best]),
+        'Pit Lap 1': int(pit_lap_1[best]),
+        'Pit Lap 2': None if pit_lap_2 is None else int(pit_lap_2[best])
+    }, name=best)
+
+
+def compound_sequences(compounds, num_stops):
+    """Yields the compound orders the app searches: at least two different compounds."""
+    for sequence in itertools.product(compounds, repeat=num_stops + 1):
+        if len(set(sequence)) >= 2:
+            yield sequence
+
+
+def _strategy_chunks(compounds, total_laps, engine, pit_stop_time_loss, min_stint_length=MIN_STINT_LENGTH):
+    """Yields (total_times, pit_lap_1, pit_lap_2) one small batch at a time.
+
+    Pit laps come from the usual windows, less any that leave a stint shorter
+    than min_stint_length in a race of total_laps.
+    """
+    if len(compounds) == 2:
+        pit_lap = one_stop_grid()
+        pit_lap = pit_lap[(pit_lap >= min_stint_length) & (total_laps - pit_lap >= min_stint_length)]
+        if len(pit_lap) == 0:
+            return
+        total_times = (
+            engine.stint_times(1, pit_lap, compounds[0])
+            + engine.stint_times(pit_lap + 1, total_laps - pit_lap, compounds[1])
+            + pit_stop_time_loss
+        )
+        yield total_times, pit_lap, None
+        return
+
+    # Two-stop grid, one first-stop lap at a time
+    pit_window_1_start, pit_window_1_end = TWO_STOP_WINDOW
+    for first_stop in range(max(pit_window_1_start, min_stint_length), pit_window_1_end + 1):
+        pit_lap_2 = np.arange(first_stop + min_stint_length, total_laps - min_stint_length + 1)
+        if len(pit_lap_2) == 0:
+            continue
+        total_times = (
+            engine.stint_times(1, first_stop, compounds[0])
+            + engine.stint_times(first_stop + 1, pit_lap_2 - first_stop, compounds[1])
+            + engine.stint_times(pit_lap_2 + 1, total_laps - pit_lap_2, compounds[2])
+            + 2 * pit_stop_time_loss
+        )
+        yield total_times, np.full(len(pit_lap_2), first_stop), pit_lap_2
+
+
+def top_k_strategies(engine, total_laps, pit_stop_time_loss, k=10, max_delta=None, compounds=DRY_COMPOUNDS,
+                     min_stint_length=MIN_STINT_LENGTH):
+    """Returns the k fastest concrete one- and two-stop strategies as a DataFrame.
+
+    Candidates are scored in small batches and only the k best are kept in a
+    bounded heap, so memory does not grow with the size of the search space.
+    If max_delta is given, only plans within max_delta seconds of the best are kept.
+    Plans with a stint shorter than min_stint_length are never considered.
+    """
+    # Max-heap of the k best so far, stored as (-time, tiebreak, row)
+    heap = []
+    counter = itertools.count()
+    for num_stops in (1, 2):
+        for sequence in compound_sequences(compounds, num_stops):
+            for total_times, pit_lap_1, pit_lap_2 in _strategy_chunks(sequence, total_laps, engine, pit_stop_time_loss, min_stint_length):
+                # Only the chunk's own k best can make it into the heap
+                if len(total_times) > k:
+                    keep = np.argpartition(total_times, k - 1)[:k]
+                else:
+                    keep = np.arange(len(total_times))
+                for i in keep:
+                    total_time = float(total_times[i])
+                    if len(heap) == k and -heap[0][0] <= total_time:
+                        continue
+                    pit_laps = [int(pit_lap_1[i])] if pit_lap_2 is None else [int(pit_lap_1[i]), int(pit_lap_2[i])]
+                    row = (sequence, pit_laps, total_time)
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-total_time, next(counter), row))
+                    else:
+                        heapq.heapreplace(heap, (-total_time, next(counter), row))
+
+    if not heap:
+        return None
+    top = StrategyArray.from_sequences([row for _, _, row in sorted(heap, key=lambda item: (-item[0], item[1]))]).to_frame(max_stops=2)
+    top['Delta (s)'] = top['Total Time (s)'] - top['Total Time (s)'].iloc[0]
+    if max_delta is not None:
+        top = top.loc[top['Delta (s)'] <= max_delta]
+    return top
+
+
+def enumerate_strategies(engine, total_laps, pit_stop_time_loss, compounds=DRY_COMPOUNDS, min_stint_length=MIN_STINT_LENGTH):
+    """Every scored one- and two-stop candidate as one StrategyArray (25 bytes per plan)."""
+    batches = []
+    for num_stops in (1, 2):
+        for sequence in compound_sequences(compounds, num_stops):
+            for total_times, pit_lap_1, pit_lap_2 in _strategy_chunks(sequence, total_laps, engine, pit_stop_time_loss, min_stint_length):
+                pit_laps = pit_lap_1 if pit_lap_2 is None else np.column_stack([pit_lap_1, pit_lap_2])
+                batches.append(StrategyArray.from_grid(sequence, pit_laps, total_times))
+    return StrategyArray.concat(batches)
+
+
+def search_one_stop(compounds, total_laps, engine, pit_stop_time_loss):
+    """Scores every one-stop pit lap in one batched computation."""
+    pit_lap = one_stop_grid()
+    total_times = (
+        engine.stint_times(1, pit_lap, compounds[0])
+        + engine.stint_times(pit_lap + 1, total_laps - pit_lap, compounds[1])
+        + pit_stop_time_loss
+    )
+    return _best_row(f"{compounds[0]}-{compounds[1]}", total_times, pit_lap)
+
+
+def search_two_stop(compounds, total_laps, engine, pit_stop_time_loss):
+    """Scores the full two-stop pit-lap grid in one batched computation."""
+    pit_lap_1, pit_lap_2 = two_stop_grid(total_laps)
+    total_times = (
+        engine.stint_times(1, pit_lap_1, compounds[0])
+        + engine.stint_times(pit_lap_1 + 1, pit_lap_2 - pit_lap_1, compounds[1])
+        + engine.stint_times(pit_lap_2 + 1, total_laps - pit_lap_2, compounds[2])
+        + 2 * pit_stop_time_loss
+    )
+    return _best_row(f"{compounds[0]}-{compounds[1]}-{compounds[2]}", total_times, pit_lap_1, pit_lap_2)
+
+
+def simulate_stint(start_lap, stint_length, compound, degradation_summary, base_lap_time, fuel_effect_per_lap):
+    """Calculates the total time for a single race stint."""
+    engine = StintEngine(degradation_summary, base_lap_time, fuel_effect_per_lap)
+    return engine.stint_time(start_lap, stint_length, compound)
+
+
+def simulate_strategy(strategy, degradation_summary, base_lap_time, fuel_effect_per_lap, pit_stop_time_loss, engine=None):
+    """Calculates the total race time for a given strategy."""
+    # Searches pass a prebuilt engine so the rate table is only built once
+    if engine is None:
+        engine = StintEngine(degradation_summary, base_lap_time, fuel_effect_per_lap)
+    return engine.strategy_time(strategy, pit_stop_time_loss)
+
+
+def find_best_one_stop(compounds, total_laps, degradation_summary, base_lap_time, fuel_effect_per_lap, pit_stop_time_loss, vectorized=True):
+    """Finds the optimal one-stop strategy."""
+    import pandas as pd
+
+    pit_window_start, pit_window_end = ONE_STOP_WINDOW
+    engine = StintEngine(degradation_summary, base_lap_time, fuel_effect_per_lap)
+    # Batched mode scores the whole pit window at once and returns the same best row
+    if vectorized:
+        return search_one_stop(compounds, total_laps, engine, pit_stop_time_loss)
+    results = []
+    for pit_lap in range(pit_window_start, pit_window_end + 1):
+        strategy = [
+            {'Compound': compounds[0], 'StintLength': pit_lap},
+            {'Compound': compounds[1], 'StintLength': total_laps - pit_lap}
+        ]
+        total_time = simulate_strategy(strategy, degradation_summary, base_lap_time, fuel_effect_per_lap, pit_stop_time_loss, engine)
+
+        # Standardize the output dictionary
+        results.append({
+            'Strategy': f"{compounds[0]}-{compounds[1]}",
+            'Total Time (s)': total_time,
+            'Pit Lap 1': pit_lap,
+            'Pit Lap 2': None  # Add a placeholder for the second stop
+        })
+
+    if not results: return None
+    results_df = pd.DataFrame(results)
+    return results_df.loc[results_df['Total Time (s)'].idxmin()]
+
+
+def find_best_two_stop(compounds, total_laps, degradation_summary, base_lap_time, fuel_effect_per_lap, pit_stop_time_loss, vectorized=True):
+    """Finds the optimal two-stop strategy."""
+    import pandas as pd
+
+    pit_window_1_start, pit_window_1_end = TWO_STOP_WINDOW
+    min_stint_length = MIN_STINT_LENGTH
+    engine = StintEngine(degradation_summary, base_lap_time, fuel_effect_per_lap)
+    if vectorized:
+        return search_two_stop(compounds, total_laps, engine, pit_stop_time_loss)
+    results = []
+    for pit_lap_1 in range(pit_window_1_start, pit_window_1_end + 1):
+        pit_window_2_start = pit_lap_1 + min_stint_length
+        pit_window_2_end = total_laps - min_stint_length
+        for pit_lap_2 in range(pit_window_2_start, pit_window_2_end + 1):
+            strategy = [
+                {'Compound': compounds[0], 'StintLength': pit_lap_1},
+                {'Compound': compounds[1], 'StintLength': pit_lap_2 - pit_lap_1},
+                {'Compound': compounds[2], 'StintLength': total_laps - pit_lap_2}
+            ]
+            total_time = simulate_strategy(strategy, degradation_summary, base_lap_time, fuel_effect_per_lap, pit_stop_time_loss, engine)
+    
+            # Standardize the output dictionary
+            results.append({
+                'Strategy': f"{compounds[0]}-{compounds[1]}-{compounds[2]}",
+                'Total Time (s)': total_time,
+                'Pit Lap 1': pit_lap_1,
+                'Pit Lap 2': pit_lap_2
+            })
+
+    if not results: return None
+    results_df = pd.DataFrame(results)
+    return results_df.loc[results_df['Total Time (s)'].idxmin()]
+
+
+
+def _uses_legal_compounds(mask, compounds):
+    """Checks the two-dry-compound rule for a bitmask of compounds used."""
+    used = [c for i, c in enumerate(compounds) if mask & (1 << i)]
+    if any(c in WET_COMPOUNDS for c in used):
+        return True
+    return len({c for c in used if c in DRY_COMPOUNDS}) >= 2
+
+
+def _stop_count_dp(engine, total_laps, pit_stop_time_loss, max_stops, compounds, min_stint_length, start=None):
+    """Runs the N-stop DP; returns the best-time table and the parent pointers to backtrack it.
+
+    The DP state is (last lap covered, stops used, set of compounds used). A stint's
+    cost only depends on its start lap, length and compound, so the compound of the
+    previous stint does not need to be part of the state. Runs in
+    O(max_stops * 2^compounds * compounds * total_laps^2).
+
+    start optionally gives a race in progress as (next lap, compound, tyre life,
+    compounds used); the first stint then continues on those tyres from that lap.
+    """
+    n_compounds = len(compounds)
+    n_masks = 1 << n_compounds
+
+    # cost[c][s, e]: time of a stint on compound c covering laps s..e (inf if too short)
+    start_lap, end_lap = np.meshgrid(np.arange(total_laps + 1), np.arange(total_laps + 1), indexing='ij')
+    stint_length = end_lap - start_lap + 1
+    too_short = (start_lap < 1) | (stint_length < max(min_stint_length, 1))
+    cost = []
+    for compound in compounds:
+        stint_cost = engine.stint_times(np.maximum(start_lap, 1), np.maximum(stint_length, 0), compound).astype(float)
+        stint_cost[too_short] = np.inf
+        cost.append(stint_cost)
+
+    # best[k][mask, e]: fastest way to cover laps 1..e with k stops using compound set mask
+    best = np.full((max_stops + 1, n_masks, total_laps + 1), np.inf)
+    parent_end = np.full(best.shape, -1, dtype=int)
+    parent_mask = np.full(best.shape, -1, dtype=int)
+    last_compound = np.full(best.shape, -1, dtype=int)
+    if start is None:
+        for c in range(n_compounds):
+            best[0, 1 << c] = cost[c][1]
+            last_compound[0, 1 << c] = c
+    else:
+        start_lap, compound, tyre_life, used = start
+        c = compounds.index(compound)
+        mask = sum(1 << i for i, used_compound in enumerate(compounds) if used_compound in used) | (1 << c)
+        # Worn tyres: no minimum stint length, and tyre life carries on from where it is
+        laps = np.arange(start_lap, total_laps + 1)
+        lap_times = engine.base_lap_time - engine.fuel_effect_per_lap * laps + engine.tyre_effect(compound, tyre_life + laps - start_lap + 1)
+        best[0, mask, start_lap:] = np.cumsum(lap_times)
+        last_compound[0, mask, start_lap:] = c
+
+    for k in range(max_stops):
+        for mask in range(1, n_masks):
+            previous = best[k, mask]
+            if not np.isfinite(previous).any():
+                continue
+            for c in range(n_compounds):
+                # Pit at the end of lap e, then run compound c over laps e+1..e'
+                candidate = previous[:-1, None] + pit_stop_time_loss + cost[c][1:]
+                prev_end = np.argmin(candidate, axis=0)
+                candidate_time = candidate[prev_end, np.arange(total_laps + 1)]
+                new_mask = mask | (1 << c)
+                better = candidate_time < best[k + 1, new_mask]
+                best[k + 1, new_mask][better] = candidate_time[better]
+                parent_end[k + 1, new_mask][better] = prev_end[better]
+                parent_mask[k + 1, new_mask][better] = mask
+                last_compound[k + 1, new_mask][better] = c
+    return best, (parent_end, parent_mask, last_compound)
+
+
+def _best_legal_mask(best, k, total_laps, compounds):
+    """Compound set of the fastest legal finish with exactly k stops, or None."""
+    best_time, best_mask = np.inf, None
+    for mask in range(1, best.shape[1]):
+        if best[k, mask, total_laps] < best_time and _uses_legal_compounds(mask, compounds):
+            best_time, best_mask = best[k, mask, total_laps], mask
+    return best_mask
+
+
+def _backtrack(parents, compounds, k, mask, total_laps):
+    """Walks the parent pointers back to recover the stints; returns a result Series."""
+    parent_end, parent_mask, last_compound = parents
+    end = total_laps
+    pit_laps, stint_compounds = [], []
+    while k >= 0:
+        stint_compounds.append(compounds[last_compound[k, mask, end]])
+        if k > 0:
+            pit_laps.append(int(parent_end[k, mask, end]))
+        k, mask, end = k - 1, parent_mask[k, mask, end], parent_end[k, mask, end]
+
+    result = {'Strategy': '-'.join(reversed(stint_compounds))}
+    for i, pit_lap in enumerate(reversed(pit_laps)):
+        result[f'Pit Lap {i + 1}'] = pit_lap
+    return result
+
+
+def optimize_by_stop_count(engine, total_laps, pit_stop_time_loss, max_stops=3, compounds=None, min_stint_length=MIN_STINT_LENGTH):
+    """Fastest legal strategy for every number of stops from 0 to max_stops, as a DataFrame.
+
+    Stop counts with no legal strategy (e.g. 0 stops on dry tyres) are left out.
+    """
+    import pandas as pd
+
+    if compounds is None:
+        compounds = list(engine.rates)
+    best, parents = _stop_count_dp(engine, total_laps, pit_stop_time_loss, max_stops, compounds, min_stint_length)
+    rows = []
+    for k in range(max_stops + 1):
+        mask = _best_legal_mask(best, k, total_laps, compounds)
+        if mask is not None:
+            rows.append({'Stops': k, **_backtrack(parents, compounds, k, mask, total_laps), 'Total Time (s)': float(best[k, mask, total_laps])})
+    return pd.DataFrame(rows)
+
+
+def optimize_strategy(engine, total_laps, pit_stop_time_loss, max_stops=3, compounds=None, min_stint_length=MIN_STINT_LENGTH):
+    """Finds the exact optimal strategy with up to max_stops stops by dynamic programming."""
+    import pandas as pd
+
+    if compounds is None:
+        compounds = list(engine.rates)
+    best, parents = _stop_count_dp(engine, total_laps, pit_stop_time_loss, max_stops, compounds, min_stint_length)
+
+    # Pick the fastest legal finish over all stop counts and compound sets
+    best_time, best_state = np.inf, None
+    for k in range(max_stops + 1):
+        mask = _best_legal_mask(best, k, total_laps, compounds)
+        if mask is not None and best[k, mask, total_laps] < best_time:
+            best_time, best_state = best[k, mask, total_laps], (k, mask)
+    if best_state is None:
+        return None
+
+    result = _backtrack(parents, compounds, *best_state, total_laps)
+    return pd.Series({'Strategy': result.pop('Strategy'), 'Total Time (s)': float(best_time), **result})
+
+
+def optimize_remaining_race(engine, current_lap, compound, tyre_life, used, total_laps, pit_stop_time_loss,
+                            max_stops=2, compounds=None, min_stint_length=MIN_STINT_LENGTH):
+    """Optimal plan for the rest of a race, from the end of current_lap on tyres tyre_life laps old.
+
+    used lists the compounds run so far, which count towards the two-dry-compound
+    rule. The Strategy starts with the current compound and Total Time (s) covers
+    the remaining laps only. Returns None if no legal finish exists.
+    """
+    import pandas as pd
+
+    if compounds is None:
+        compounds = list(engine.rates)
+    if compound not in compounds:
+        raise ValueError(f"No degradation data for the current compound {compound}")
+    start = (current_lap + 1, compound, tyre_life, used)
+    best, parents = _stop_count_dp(engine, total_laps, pit_stop_time_loss, max_stops, compounds, min_stint_length, start)
+
+    best_time, best_state = np.inf, None
+    for k in range(max_stops + 1):
+        mask = _best_legal_mask(best, k, total_laps, compounds)
+        if mask is not None and best[k, mask, total_laps] < best_time:
+            best_time, best_state = best[k, mask, total_laps], (k, mask)
+    if best_state is None:
+        return None
+
+    result = _backtrack(parents, compounds, *best_state, total_laps)
+    return pd.Series({'Strategy': result.pop('Strategy'), 'Total Time (s)': float(best_time), **result})
@@ -0,0 +1,162 @@
+import numpy as np
+
+# Growth rates (per lap of tyre life) tried when fitting the exponential model
+GROWTH_RATES = np.linspace(0.005, 0.3, 60)
+# Fewest laps on each side of a cliff, so a short run of noisy laps cannot define one
+MIN_CLIFF_SEGMENT_LAPS = 6
+
+
+class LinearTyreModel:
+    """Constant loss per lap of tyre life (the original model)."""
+
+    def fit(self, tyre_life, lap_time):
+        self.slope = np.polyfit(tyre_life, lap_time, 1)[0]
+        return self
+
+    def degradation(self, tyre_life):
+        """Seconds lost relative to a new tyre at the given tyre life."""
+        return self.slope * np.asarray(tyre_life, dtype=float)
+
+
+class _BoundedCurve:
+    """Shared by the non-linear models: a fitted curve kept sensible outside the data.
+
+    Beyond the tyre lives seen in the fit the curve carries on in a straight line
+    from the edge of the data, and the loss is clamped to be non-negative and
+    non-decreasing in tyre life, so no extrapolation makes old tyres faster.
+    Subclasses give the curve and its slope.
+    """
+
+    def _set_range(self, tyre_life):
+        self.fitted_range = (float(np.min(tyre_life)), float(np.max(tyre_life)))
+
+    def _extended(self, tyre_life):
+        low, high = self.fitted_range
+        inside = np.clip(tyre_life, low, high)
+        return self._curve(inside) + self._slope(inside) * (tyre_life - inside)
+
+    def degradation(self, tyre_life):
+        """Seconds lost relative to a new tyre at the given tyre life."""
+        tyre_life = np.asarray(tyre_life, dtype=float)
+        # Evaluated on whole laps from a new tyre so the running maximum sees every lap before tyre_life
+        grid = np.arange(0.0, np.ceil(max(np.max(tyre_life, initial=0.0), 0.0)) + 1)
+        loss = self._extended(grid) - self._extended(0.0)
+        loss = np.maximum.accumulate(np.maximum(loss, 0.0))
+        return np.interp(tyre_life, grid, loss)
+
+
+class PolynomialTyreModel(_BoundedCurve):
+    """Polynomial in tyre life, which can bend upwards towards the end of a stint."""
+
+    def __init__(self, degree=2):
+        self.degree = degree
+
+    def fit(self, tyre_life, lap_time):
+        self._set_range(tyre_life)
+        self.coeffs = np.polyfit(tyre_life, lap_time, self.degree)
+        return self
+
+    def _curve(self, tyre_life):
+        return np.polyval(self.coeffs, tyre_life)
+
+    def _slope(self, tyre_life):
+        return np.polyval(np.polyder(self.coeffs), tyre_life)
+
+
+class CliffTyreModel(_BoundedCurve):
+    """Piecewise linear: one slope until a learned cliff lap, a second slope after it."""
+
+    def __init__(self, min_laps_each_side=MIN_CLIFF_SEGMENT_LAPS):
+        self.min_laps_each_side = min_laps_each_side
+
+    def fit(self, tyre_life, lap_time):
+        tyre_life = np.asarray(tyre_life, dtype=float)
+        lap_time = np.asarray(lap_time, dtype=float)
+        self._set_range(tyre_life)
+
+        # Start from a plain linear fit, then try every cliff lap with enough laps on both sides
+        linear_coeffs = np.polyfit(tyre_life, lap_time, 1)
+        self.slope, self.cliff_lap, self.cliff_slope = linear_coeffs[0], np.inf, 0.0
+        best_error = np.sum((lap_time - np.polyval(linear_coeffs, tyre_life)) ** 2)
+        for cliff_lap in np.unique(tyre_life):
+            if (tyre_life <= cliff_lap).sum() < self.min_laps_each_side or (tyre_life > cliff_lap).sum() < self.min_laps_each_side:
+                continue
+            design = np.column_stack([np.ones_like(tyre_life), tyre_life, np.maximum(tyre_life - cliff_lap, 0.0)])
+            coeffs, _, _, _ = np.linalg.lstsq(design, lap_time, rcond=None)
+            error = np.sum((lap_time - design @ coeffs) ** 2)
+            if error < best_error:
+                best_error = error
+                self.slope, self.cliff_lap, self.cliff_slope = coeffs[1], cliff_lap, coeffs[2]
+        return self
+
+    def _curve(self, tyre_life):
+        return self.slope * tyre_life + self.cliff_slope * np.maximum(tyre_life - self.cliff_lap, 0.0)
+
+    def _slope(self, tyre_life):
+        return self.slope + self.cliff_slope * (tyre_life > self.cliff_lap)
+
+
+class ExponentialTyreModel(_BoundedCurve):
+    """Loss growing like exp(growth * tyre_life), fitted by a grid search over the growth rate."""
+
+    def __init__(self, growth_rates=None):
+        self.growth_rates = GROWTH_RATES if growth_rates is None else growth_rates
+
+    def fit(self, tyre_life, lap_time):
+        tyre_life = np.asarray(tyre_life, dtype=float)
+        lap_time = np.asarray(lap_time, dtype=float)
+        self._set_range(tyre_life)
+        best_error = np.inf
+        for growth_rate in self.growth_rates:
+            # For a fixed growth rate the model is linear in its other two parameters
+            design = np.column_stack([np.ones_like(tyre_life), np.expm1(growth_rate * tyre_life)])
+            coeffs, _, _, _ = np.linalg.lstsq(design, lap_time, rcond=None)
+            error = np.sum((lap_time - design @ coeffs) ** 2)
+            if error < best_error:
+                best_error = error
+                self.growth_rate, self.scale = growth_rate, coeffs[1]
+        return self
+
+    def _curve(self, tyre_life):
+        return self.scale * np.expm1(self.growth_rate * tyre_life)
+
+    def _slope(self, tyre_life):
+        return self.scale * self.growth_rate * np.exp(self.growth_rate * tyre_life)
+
+
+class AveragedTyreModel:
+    """Average of several fitted curves, e.g. every driver's curve on one compound."""
+
+    def __init__(self, models):
+        self.models = models
+
+    def degradation(self, tyre_life):
+        return np.mean([model.degradation(tyre_life) for model in self.models], axis=0)
+
+
+TYRE_MODELS = {
+    'linear': LinearTyreModel,
+    'polynomial': PolynomialTyreModel,
+    'cliff': CliffTyreModel,
+    'exponential': ExponentialTyreModel
+}
+
+
+def fit_tyre_models(clean_laps, model='linear', **options):
+    """Fits one curve per (driver, compound) and averages them per compound.
+
+    clean_laps comes from degradation_fit.clean_stint_laps. Averaging the
+    per-driver curves mirrors how the app averages per-driver slopes, so the
+    'linear' model reproduces the usual degradation summary.
+    """
+    fitted = {}
+    for (_, compound), group in clean_laps.groupby(['Driver', 'Compound']):
+        tyre_model = TYRE_MODELS[model](**options).fit(group['TyreLife'].to_numpy(), group['CorrectedLapTime'].to_numpy())
+        fitted.setdefault(compound, []).append(tyre_model)
+    return {compound: AveragedTyreModel(models) for compound, models in fitted.items()}
+
+
+def compile_lap_costs(tyre_model, max_tyre_life):
+    """Cumulative tyre cost by tyre life: costs[n] is the total loss over laps 1..n of a stint."""
+    tyre_life = np.arange(1, max_tyre_life + 1)
+    return np.concatenate([[0.0], np.cumsum(tyre_model.degradation(tyre_life))])
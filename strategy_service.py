@@ -0,0 +1,223 @@
+"""Headless strategy service: POST batches of race scenarios, get ranked strategies back as JSON.
+
+Example:
+    python strategy_service.py --port 8765 --workers 4
+    curl -X POST localhost:8765/strategies -d '{"scenarios": [{"id": "bahrain",
+        "total_laps": 57, "degradation": {"SOFT": 0.12, "MEDIUM": 0.07, "HARD": 0.04}}]}'
+
+Each scenario is scored independently. A bad scenario gets an "error" entry and
+does not fail the rest of the batch, but a scenario over the size limits below
+rejects the whole request with a 400. Engines and results are cached per process,
+so repeated or overlapping scenarios are served warm across requests.
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import tornado.ioloop
+import tornado.web
+
+from strategy_core.stint_engine import MISSING_COMPOUND_TIME, StintEngine
+from strategy_core.strategy_array import COMPOUNDS, MAX_STOPS
+from strategy_core.strategy_search import MIN_STINT_LENGTH, optimize_strategy, top_k_strategies
+
+# Values used for any scenario field a request leaves out (degradation is required)
+SCENARIO_DEFAULTS = {
+    'id': None,
+    'total_laps': 57,
+    'pit_stop_time_loss': 22.0,
+    'base_lap_time': 99.5,
+    'fuel_effect_per_lap': 0.04,
+    'compounds': None,
+    'max_stops': 3,
+    'top_k': 10,
+    'min_stint_length': MIN_STINT_LENGTH
+}
+MAX_BATCH_SIZE = 1000
+# Largest scenario accepted; search cost grows with 2^compounds and total_laps^2, so these cap one request's work
+MAX_TOTAL_LAPS = 100
+MAX_COMPOUNDS = len(COMPOUNDS)
+MAX_TOP_K = 100
+DEFAULT_PORT = 8765
+
+
+class ScenarioLimitError(ValueError):
+    """A scenario asks for more work than the service accepts; the request is rejected with a 400."""
+
+
+def _degradation_items(degradation):
+    """Accepts {"SOFT": 0.12, ...} or [{"Compound": "SOFT", "Degradation": 0.12}, ...]."""
+    if isinstance(degradation, dict):
+        items = degradation.items()
+    elif isinstance(degradation, list):
+        items = [(row['Compound'], row['Degradation']) for row in degradation]
+    else:
+        raise ValueError("degradation must be a {compound: rate} object or a list of {Compound, Degradation} rows")
+    return tuple((str(compound), float(rate)) for compound, rate in items)
+
+
+def parse_scenario(raw):
+    """Validates one scenario and returns it as a hashable cache key."""
+    if not isinstance(raw, dict):
+        raise ValueError("each scenario must be a JSON object")
+    unknown = set(raw) - set(SCENARIO_DEFAULTS) - {'degradation'}
+    if unknown:
+        raise ValueError(f"unknown scenario fields: {', '.join(sorted(unknown))}")
+    if 'degradation' not in raw:
+        raise ValueError("scenario is missing 'degradation'")
+
+    scenario = {**SCENARIO_DEFAULTS, **raw}
+    degradation = _degradation_items(scenario['degradation'])
+    if not degradation:
+        raise ValueError("degradation needs at least one compound")
+    compounds = tuple(scenario['compounds']) if scenario['compounds'] else tuple(compound for compound, _ in degradation)
+    total_laps = int(scenario['total_laps'])
+    if total_laps < 2:
+        raise ValueError("total_laps must be at least 2")
+    max_stops, top_k, min_stint_length = int(scenario['max_stops']), int(scenario['top_k']), int(scenario['min_stint_length'])
+    limits = [
+        ('total_laps', total_laps, 2, MAX_TOTAL_LAPS),
+        ('degradation compounds', len(degradation), 1, MAX_COMPOUNDS),
+        ('compounds', len(compounds), 1, MAX_COMPOUNDS),
+        ('max_stops', max_stops, 0, MAX_STOPS),
+        ('top_k', top_k, 0, MAX_TOP_K),
+        ('min_stint_length', min_stint_length, 1, total_laps)
+    ]
+    for name, value, low, high in limits:
+        if not low <= value <= high:
+            raise ScenarioLimitError(f"{name} must be between {low} and {high}, got {value}")
+    return (
+        degradation, total_laps, float(scenario['pit_stop_time_loss']), float(scenario['base_lap_time']),
+        float(scenario['fuel_effect_per_lap']), compounds, max_stops, top_k, min_stint_length
+    )
+
+
+@lru_cache(maxsize=256)
+def _engine(degradation, base_lap_time, fuel_effect_per_lap):
+    """One engine per degradation table and lap-time model, shared by every request."""
+    degradation_summary = pd.DataFrame(list(degradation), columns=['Compound', 'Degradation'])
+    return StintEngine(degradation_summary, base_lap_time, fuel_effect_per_lap)
+
+
+def _plan(strategy, total_time, pit_laps, delta=None):
+    plan = {'strategy': strategy, 'total_time': float(total_time), 'pit_laps': [int(lap) for lap in pit_laps if not pd.isna(lap)]}
+    if delta is not None:
+        plan['delta'] = float(delta)
+    return plan
+
+
+@lru_cache(maxsize=4096)
+def _score(key):
+    degradation, total_laps, pit_loss, base_lap_time, fuel_effect, compounds, max_stops, top_k, min_stint_length = key
+    engine = _engine(degradation, base_lap_time, fuel_effect)
+
+    optimal = optimize_strategy(engine, total_laps, pit_loss, max_stops=max_stops, compounds=list(compounds),
+                                min_stint_length=min_stint_length)
+    if optimal is not None:
+        pit_lap_columns = [c for c in optimal.index if c.startswith('Pit Lap')]
+        optimal = _plan(optimal['Strategy'], optimal['Total Time (s)'], optimal[pit_lap_columns])
+
+    top_plans = top_k_strategies(engine, total_laps, pit_loss, k=top_k, compounds=compounds,
+                                 min_stint_length=min_stint_length) if top_k > 0 else None
+    ranked = []
+    if top_plans is not None:
+        top_plans = top_plans.loc[top_plans['Total Time (s)'] < MISSING_COMPOUND_TIME]
+        ranked = [
+            _plan(row['Strategy'], row['Total Time (s)'], [row['Pit Lap 1'], row['Pit Lap 2']], row['Delta (s)'])
+            for _, row in top_plans.iterrows()
+        ]
+    return {'optimal': optimal, 'top': ranked}
+
+
+def score_scenario(raw):
+    """Scores one scenario; errors are returned in the result instead of raised."""
+    scenario_id = raw.get('id') if isinstance(raw, dict) else None
+    try:
+        result = _score(parse_scenario(raw))
+    except Exception as e:
+        # Anything a scenario trips over is reported on that scenario, never on the whole batch
+        return {'id': scenario_id, 'error': str(e) or type(e).__name__}
+    return {'id': scenario_id, **result}
+
+
+def cache_stats():
+    return {
+        'engines': _engine.cache_info()._asdict(),
+        'results': _score.cache_info()._asdict()
+    }
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class StrategiesHandler(tornado.web.RequestHandler):
+    """POST /strategies with {"scenarios": [...]}; returns {"results": [...]} in the same order."""
+
+    def initialize(self, executor):
+        self.executor = executor
+
+    def write_json(self, payload, status=200):
+        self.set_status(status)
+        self.set_header('Content-Type', 'application/json')
+        self.finish(json.dumps(payload, default=_json_default))
+
+    async def post(self):
+        try:
+            scenarios = json.loads(self.request.body)['scenarios']
+        except (ValueError, KeyError, TypeError):
+            return self.write_json({'error': 'body must be a JSON object with a "scenarios" list'}, 400)
+        if not isinstance(scenarios, list):
+            return self.write_json({'error': '"scenarios" must be a list'}, 400)
+        if len(scenarios) > MAX_BATCH_SIZE:
+            return self.write_json({'error': f'at most {MAX_BATCH_SIZE} scenarios per request'}, 400)
+        for i, raw in enumerate(scenarios):
+            try:
+                parse_scenario(raw)
+            except ScenarioLimitError as e:
+                return self.write_json({'error': f'scenario {i}: {e}'}, 400)
+            except Exception:
+                # Other problems are reported on the scenario's own result
+                pass
+
+        # Score on the worker pool so other requests keep being accepted meanwhile
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(loop.run_in_executor(self.executor, score_scenario, s) for s in scenarios))
+        self.write_json({'results': results})
+
+
+class HealthHandler(tornado.web.RequestHandler):
+    """GET /health reports cache usage."""
+
+    def get(self):
+        self.write({'status': 'ok', 'cache': cache_stats()})
+
+
+def make_app(workers=4):
+    executor = ThreadPoolExecutor(max_workers=workers)
+    return tornado.web.Application([
+        (r'/strategies', StrategiesHandler, {'executor': executor}),
+        (r'/health', HealthHandler)
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve batch strategy scoring over HTTP/JSON.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=4, help="Scenarios scored in parallel")
+    args = parser.parse_args(argv)
+
+    make_app(args.workers).listen(args.port, address=args.host)
+    print(f"Strategy service listening on http://{args.host}:{args.port}")
+    tornado.ioloop.IOLoop.current().start()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+from strategy_core.strategy_search import MIN_STINT_LENGTH, optimize_by_stop_count
+
+
+def race_constant(total_laps, base_lap_time, fuel_effect_per_lap):
+    """Time every plan spends on base pace minus fuel burn-off, whatever its stints."""
+    return total_laps * base_lap_time - fuel_effect_per_lap * total_laps * (total_laps + 1) / 2
+
+
+def stop_count_plans(engine, total_laps, max_stops=3, compounds=None, min_stint_length=MIN_STINT_LENGTH):
+    """Best plan per stop count with its tyre-only time (no base pace, fuel or pit loss)."""
+    plans = optimize_by_stop_count(engine, total_laps, 0.0, max_stops, compounds, min_stint_length)
+    plans['Tyre Time (s)'] = plans.pop('Total Time (s)') - race_constant(total_laps, engine.base_lap_time, engine.fuel_effect_per_lap)
+    pit_lap_columns = [c for c in plans.columns if c.startswith('Pit Lap')]
+    plans['Plan'] = [
+        f"{row['Strategy']} ({', '.join(str(int(lap)) for lap in row[pit_lap_columns] if not pd.isna(lap))})"
+        for _, row in plans.iterrows()
+    ]
+    return plans
+
+
+def sweep_optimal_strategy(engine, total_laps, pit_stop_losses, fuel_effects, base_lap_times,
+                           max_stops=3, compounds=None, min_stint_length=MIN_STINT_LENGTH):
+    """Optimal plan at every (pit loss, fuel effect, base lap time) grid point.
+
+    Base pace and fuel burn-off add the same time to every plan, so within one
+    stop count the ranking never changes across the grid. One DP solve per
+    degradation model gives the best plan for each stop count. Each grid point is
+    then an argmin over tyre time + stops * pit loss, broadcast over the grid.
+
+    engine may be a StintEngine or a callable taking the fuel effect and returning
+    one, for when the degradation fit itself depends on the fuel correction (as in
+    the app). A plain engine is solved once for the whole grid.
+    """
+    pit_stop_losses = np.asarray(pit_stop_losses, dtype=float)
+    fuel_effects = np.asarray(fuel_effects, dtype=float)
+    base_lap_times = np.asarray(base_lap_times, dtype=float)
+
+    shared_plans = None if callable(engine) else stop_count_plans(engine, total_laps, max_stops, compounds, min_stint_length)
+    frames = []
+    for fuel_effect in fuel_effects:
+        plans = shared_plans if shared_plans is not None else stop_count_plans(engine(fuel_effect), total_laps, max_stops, compounds, min_stint_length)
+        if plans.empty:
+            continue
+
+        # (pit loss x plan) race time without the plan-independent constant
+        plan_times = plans['Tyre Time (s)'].to_numpy()[None, :] + pit_stop_losses[:, None] * plans['Stops'].to_numpy()[None, :]
+        order = np.argsort(plan_times, axis=1)
+        winner = order[:, 0]
+        best_time = np.take_along_axis(plan_times, order[:, :1], axis=1)[:, 0]
+        # How much slower the runner-up is, i.e. how close the point is to a flip
+        margin = np.take_along_axis(plan_times, order[:, 1:2], axis=1)[:, 0] - best_time if len(plans) > 1 else np.full(len(winner), np.inf)
+
+        pit_grid, base_grid = np.meshgrid(np.arange(len(pit_stop_losses)), base_lap_times, indexing='ij')
+        pit_index = pit_grid.ravel()
+        frames.append(pd.DataFrame({
+            'Pit Loss (s)': pit_stop_losses[pit_index],
+            'Fuel Effect (s/lap)': fuel_effect,
+            'Base Lap Time (s)': base_grid.ravel(),
+            'Plan': plans['Plan'].to_numpy()[winner[pit_index]],
+            'Stops': plans['Stops'].to_numpy()[winner[pit_index]],
+            'Total Time (s)': best_time[pit_index] + race_constant(total_laps, base_grid.ravel(), fuel_effect),
+            'Margin (s)': margin[pit_index]
+        }))
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+
+
+def flip_map(sweep, index='Fuel Effect (s/lap)', columns='Pit Loss (s)'):
+    """Pivots a sweep into a grid of optimal plans; the remaining axis must hold one value."""
+    other_axes = {'Pit Loss (s)', 'Fuel Effect (s/lap)', 'Base Lap Time (s)'} - {index, columns}
+    for axis in other_axes:
+        if sweep[axis].nunique() > 1:
+            raise ValueError(f"Select a single '{axis}' value before pivoting")
+    return sweep.pivot(index=index, columns=columns, values='Plan')
+
+
+def pit_loss_thresholds(plans):
+    """Exact pit losses at which the optimal plan changes, from stop_count_plans output.
+
+    Each plan's time is a line in the pit loss (tyre time + stops * pit loss), so
+    the optimum follows their lower envelope. Walking it from zero pit loss upwards
+    gives every flip.
+    """
+    tyre_times = plans['Tyre Time (s)'].to_numpy()
+    stops = plans['Stops'].to_numpy()
+    thresholds = []
+    current, pit_loss = int(np.argmin(tyre_times)), 0.0
+    while True:
+        # Only plans with fewer stops can take over as the pit loss grows
+        fewer = np.flatnonzero(stops < stops[current])
+        if len(fewer) == 0:
+            break
+        crossings = (tyre_times[fewer] - tyre_times[current]) / (stops[current] - stops[fewer])
+        crossings = np.maximum(crossings, pit_loss)
+        # On a tie the plan with the fewest stops wins beyond the crossing
+        nearest = np.lexsort((stops[fewer], crossings))[0]
+        thresholds.append({
+            'Pit Loss (s)': float(crossings[nearest]),
+            'From': plans['Plan'].iloc[current],
+            'To': plans['Plan'].iloc[fewer[nearest]]
+        })
+        current, pit_loss = int(fewer[nearest]), float(crossings[nearest])
+    return pd.DataFrame(thresholds, columns=['Pit Loss (s)', 'From', 'To'])
@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from backtest import cached_races, race_result
+from benchmark import make_synthetic_laps
+from lap_store import LapStore
+
+
+def test_race_result_ignores_a_missing_lap_time():
+    laps = make_synthetic_laps(6, 40)
+    winner, race_time, _, _ = race_result(laps)
+    assert race_time == pytest.approx(laps.groupby('Driver')['LapTime'].sum()[winner].total_seconds())
+
+    laps.loc[(laps['Driver'] == winner) & (laps['LapNumber'] == 20), 'LapTime'] = np.nan
+    assert race_result(laps)[:2] == (winner, race_time)
+
+
+def test_race_pairs_with_practice_stored_under_the_fastf1_name(tmp_path):
+    store = LapStore(str(tmp_path))
+    store.write(2023, 'Bahrain', 'R', make_synthetic_laps(4, 30))
+    store.write(2023, 'Bahrain Grand Prix', 'FP2', make_synthetic_laps(4, 30))
+    assert cached_races(store) == [(2023, 'Bahrain')]
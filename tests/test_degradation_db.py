@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+
+from benchmark import make_synthetic_laps
+from degradation_db import DegradationDB, session_priors
+from lap_store import LapStore
+from strategy_core.degradation_fit import fit_degradation_batch
+
+
+def test_session_priors_match_the_per_driver_summary(tmp_path):
+    laps = make_synthetic_laps(8, 57)
+    store = LapStore(str(tmp_path / 'store'))
+    store.write(2023, 'Bahrain', 'R', laps)
+
+    priors = session_priors(2023, 'Bahrain', 'R', db=DegradationDB(str(tmp_path / 'fits.db')), store=store)
+    expected = fit_degradation_batch(laps).groupby('Compound')['Degradation'].mean()
+    np.testing.assert_allclose(pd.DataFrame(priors).set_index('Compound')['Degradation'][expected.index], expected)
@@ -0,0 +1,30 @@
+import pytest
+
+import ingest_season
+import lap_store
+from benchmark import make_synthetic_laps
+from lap_store import LapStore, event_key, load_laps
+
+
+@pytest.mark.parametrize('fastf1_name, app_name', [
+    ('Bahrain Grand Prix', 'Bahrain'),
+    ('Saudi Arabian Grand Prix', 'Saudi Arabia'),
+    ('British Grand Prix', 'Great Britain'),
+    ('São Paulo Grand Prix', 'Brazil'),
+    ('Emilia Romagna Grand Prix', 'Emilia Romagna'),
+])
+def test_event_key_matches_fastf1_and_app_names(fastf1_name, app_name):
+    assert event_key(fastf1_name) == event_key(app_name)
+
+
+def test_ingested_session_is_found_by_app_event_name(tmp_path, monkeypatch):
+    laps = make_synthetic_laps(4, 30)
+    monkeypatch.setattr(ingest_season, 'fetch_session_laps', lambda year, event, session: laps)
+    # A second fetch would mean the ingested copy was not reused
+    def fail(*args):
+        raise AssertionError("session fetched again")
+    monkeypatch.setattr(lap_store, 'fetch_session_laps', fail)
+
+    ingest_season.ingest_session(2023, 'Bahrain Grand Prix', 'R', str(tmp_path))
+    stored = load_laps(2023, 'Bahrain', 'R', LapStore(str(tmp_path)))
+    assert len(stored) == len(laps)
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from benchmark import make_synthetic_laps
+from live_strategy import LiveRace, replay_session
+from online_fit import STINT_KEYS
+from strategy_core.degradation_fit import clean_stint_laps, fit_groups
+
+
+def test_replayed_fits_match_batch_fits_once_each_stint_is_complete():
+    laps = make_synthetic_laps(4, 40)
+    laps.loc[laps['LapNumber'] == 1, 'LapTime'] += pd.Timedelta(seconds=9)
+    stint_end = laps.groupby(list(STINT_KEYS))['LapNumber'].max().rename('StintEnd').reset_index()
+    live_race = LiveRace(40, 99.5, 22.0)
+
+    checked = 0
+    for lap_number, _, _ in replay_session(laps, live_race):
+        fed = laps.loc[laps['LapNumber'] <= lap_number]
+        live = live_race.degradation.fits()
+        if live.empty:
+            continue
+        batch = fit_groups(clean_stint_laps(fed, 0.04, by=STINT_KEYS), by=STINT_KEYS)
+        live = live.merge(stint_end, on=list(STINT_KEYS))
+        complete = live.loc[live['StintEnd'] <= lap_number].merge(batch, on=list(STINT_KEYS), how='left')
+        np.testing.assert_allclose(complete['Degradation_x'], complete['Degradation_y'])
+        np.testing.assert_array_equal(complete['Laps_x'], complete['Laps_y'])
+        checked += len(complete)
+    assert checked
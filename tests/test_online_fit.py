@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import make_synthetic_laps
+from online_fit import DegradationEstimator, STINT_KEYS
+from strategy_core.degradation_fit import clean_stint_laps, fit_groups
+
+
+def batch_fits(laps):
+    return fit_groups(clean_stint_laps(laps, 0.04, by=STINT_KEYS), by=STINT_KEYS)
+
+
+def test_online_fit_matches_batch_when_the_stint_starts_slow():
+    laps = make_synthetic_laps(4, 40, outlier_rate=0)
+    # A standing start: lap 1 far over 107% of the stint median
+    laps.loc[laps['LapNumber'] == 1, 'LapTime'] += pd.Timedelta(seconds=9)
+    estimator = DegradationEstimator()
+    for _, lap in laps.sort_values('LapNumber').groupby('LapNumber'):
+        estimator.add_laps(lap)
+
+    online = estimator.fits().merge(batch_fits(laps), on=list(STINT_KEYS), how='outer')
+    assert len(online) == len(estimator.fits())
+    np.testing.assert_allclose(online['Degradation_x'], online['Degradation_y'])
+    np.testing.assert_array_equal(online['Laps_x'], online['Laps_y'])
+
+
+def test_removing_laps_matches_a_fit_without_them():
+    laps = make_synthetic_laps(4, 40)
+    estimator = DegradationEstimator()
+    estimator.add_laps(laps)
+    deleted = DegradationEstimator._usable(laps).loc[lambda usable: usable['LapNumber'] % 7 == 3]
+    for lap in deleted.itertuples(index=False):
+        estimator.remove_lap(lap.Driver, lap.Compound, lap.Stint, lap.LapNumber, lap.TyreLife, lap.LapTime.total_seconds())
+
+    online = estimator.fits().merge(batch_fits(laps.drop(deleted.index)), on=list(STINT_KEYS))
+    assert len(online) == len(estimator.fits())
+    np.testing.assert_allclose(online['Degradation_x'], online['Degradation_y'])
+
+
+def test_merge_keeps_sessions_apart():
+    bahrain = DegradationEstimator.from_laps(make_synthetic_laps(4, 40, seed=1), session=(2023, 'Bahrain', 'R'))
+    monaco = DegradationEstimator.from_laps(make_synthetic_laps(4, 40, seed=2), session=(2023, 'Monaco', 'R'))
+    bahrain_stints = len(bahrain.stints)
+    merged = bahrain.merge(monaco)
+    assert len(merged.stints) == bahrain_stints + len(monaco.stints)
+    assert set(merged.fits()['Session']) == {(2023, 'Bahrain', 'R'), (2023, 'Monaco', 'R')}
+
+
+def test_merging_halves_of_a_session_matches_the_whole():
+    laps = make_synthetic_laps(4, 40)
+    first = DegradationEstimator.from_laps(laps.loc[laps['LapNumber'] <= 20])
+    second = DegradationEstimator.from_laps(laps.loc[laps['LapNumber'] > 20])
+    merged = first.merge(second).fits().merge(batch_fits(laps), on=list(STINT_KEYS))
+    np.testing.assert_allclose(merged['Degradation_x'], merged['Degradation_y'])
+
+
+def test_merge_refuses_overlapping_laps():
+    laps = make_synthetic_laps(4, 40)
+    first = DegradationEstimator.from_laps(laps, session='R')
+    second = DegradationEstimator.from_laps(laps, session='R')
+    with pytest.raises(ValueError):
+        first.merge(second)
@@ -0,0 +1,16 @@
+from strategy_service import score_scenario
+
+
+def test_top_plans_respect_race_length_and_min_stint():
+    result = score_scenario({'total_laps': 30, 'min_stint_length': 10, 'top_k': 50,
+                             'degradation': {'SOFT': 0.1, 'HARD': 0.05}})
+    assert result['top']
+    for plan in result['top']:
+        stops = [0, *plan['pit_laps'], 30]
+        assert min(b - a for a, b in zip(stops, stops[1:])) >= 10
+
+
+def test_short_race_has_no_top_plans_when_no_stint_fits():
+    result = score_scenario({'total_laps': 15, 'degradation': {'SOFT': 0.1, 'HARD': 0.05}})
+    assert result['optimal'] is None
+    assert result['top'] == []
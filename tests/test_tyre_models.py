@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from strategy_core.tyre_models import MIN_CLIFF_SEGMENT_LAPS, CliffTyreModel, ExponentialTyreModel, PolynomialTyreModel
+
+
+@pytest.mark.parametrize('tyre_model', [PolynomialTyreModel(), CliffTyreModel(), ExponentialTyreModel()])
+def test_curves_stay_non_negative_and_non_decreasing_outside_the_data(tyre_model):
+    rng = np.random.default_rng(0)
+    tyre_life = np.arange(5, 25, dtype=float)
+    # Tyres that get faster early on, then steeply slower: the raw fits dip below zero and blow up later
+    lap_time = 95 - 0.3 * tyre_life + 0.02 * tyre_life ** 2 + rng.normal(0, 0.05, tyre_life.size)
+    loss = tyre_model.fit(tyre_life, lap_time).degradation(np.arange(0, 60))
+    assert loss[0] == 0
+    assert (loss >= 0).all()
+    assert (np.diff(loss) >= 0).all()
+    # Straight-line continuation past the data rather than a curve running away
+    assert np.diff(loss[30:])[-1] == pytest.approx(np.diff(loss[30:])[0])
+
+
+def test_cliff_leaves_a_full_segment_on_each_side():
+    tyre_life = np.arange(1, 21, dtype=float)
+    lap_time = 95 + 0.05 * tyre_life
+    lap_time[-3:] += 2.0
+    cliff_lap = CliffTyreModel().fit(tyre_life, lap_time).cliff_lap
+    assert (tyre_life > cliff_lap).sum() >= MIN_CLIFF_SEGMENT_LAPS > 3
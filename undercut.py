@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+
+from field_simulation import DIRTY_AIR_GAP, DIRTY_AIR_PENALTY, MIN_FOLLOW_GAP, OVERTAKE_DELTA
+from strategy_core.strategy_search import DRY_COMPOUNDS, WET_COMPOUNDS
+
+
+def stint_state(laps, driver, lap):
+    """A driver's tyre state and race time at the end of a lap of the session.
+
+    RaceTime is the session time at the end of the lap rather than a sum of lap
+    times, which would skip laps without a LapTime (deleted laps, some pit laps)
+    and understate the gap to a rival.
+    """
+    if 'Time' not in laps.columns:
+        raise ValueError("These laps have no session times; ingest the session again to get them")
+    driver_laps = laps.loc[(laps['Driver'] == driver) & (laps['LapNumber'] <= lap)].sort_values(by='LapNumber')
+    if driver_laps.empty or driver_laps['LapNumber'].iloc[-1] != lap:
+        raise ValueError(f"{driver} has no lap {lap} in this session")
+    current = driver_laps.iloc[-1]
+    if pd.isna(current['Time']):
+        raise ValueError(f"{driver} has no session time for lap {lap}")
+    return {
+        'Compound': current['Compound'],
+        'TyreLife': int(current['TyreLife']),
+        'Used': sorted(driver_laps['Compound'].dropna().unique()),
+        'RaceTime': current['Time'].total_seconds()
+    }
+
+
+def legal_new_compounds(used, compounds=DRY_COMPOUNDS):
+    """Compounds a car may fit at its last stop and still meet the two-dry-compound rule."""
+    used_dry = set(used) & set(DRY_COMPOUNDS)
+    if len(used_dry) >= 2 or set(used) & set(WET_COMPOUNDS):
+        return list(compounds)
+    return [compound for compound in compounds if compound not in used_dry]
+
+
+def stop_options(engine, state, current_lap, total_laps, pit_stop_time_loss, pace_offset=0.0, compounds=DRY_COMPOUNDS):
+    """Lap times (option x remaining lap) for every legal (new compound, pit lap) one-stop finish.
+
+    The car runs its current tyres until the end of the pit lap, then the new
+    compound to the flag. Returns (options, lap_times, pitting), where options is a
+    Compound / Pit Lap table with one row per option.
+    """
+    if state['Compound'] not in engine.rates:
+        raise ValueError(f"No degradation data for the current compound {state['Compound']}")
+    laps = np.arange(current_lap + 1, total_laps + 1)
+    pit_laps = np.arange(current_lap + 1, total_laps)
+    new_compounds = [c for c in legal_new_compounds(state['Used'], compounds) if c in engine.rates]
+
+    compound_index, pit_lap = np.meshgrid(np.arange(len(new_compounds)), pit_laps, indexing='ij')
+    compound_index, pit_lap = compound_index.ravel(), pit_lap.ravel()
+    before_stop = laps[None, :] <= pit_lap[:, None]
+
+    old_tyres = engine.tyre_effect(state['Compound'], state['TyreLife'] + laps - current_lap)
+    new_life = np.maximum(laps[None, :] - pit_lap[:, None], 0)
+    new_tyres = np.zeros(before_stop.shape)
+    for i, compound in enumerate(new_compounds):
+        rows = compound_index == i
+        new_tyres[rows] = engine.tyre_effect(compound, new_life[rows])
+
+    pitting = laps[None, :] == pit_lap[:, None]
+    lap_times = (
+        engine.base_lap_time - engine.fuel_effect_per_lap * laps[None, :] + pace_offset
+        + np.where(before_stop, old_tyres[None, :], new_tyres)
+        + pitting * pit_stop_time_loss
+    )
+    options = pd.DataFrame({'Compound': np.array(new_compounds, dtype=object)[compound_index], 'Pit Lap': pit_lap})
+    return options, lap_times, pitting
+
+
+def response_surface(my_lap_times, my_pitting, rival_lap_times, rival_pitting, gap=0.0,
+                     overtake_delta=OVERTAKE_DELTA, min_follow_gap=MIN_FOLLOW_GAP,
+                     dirty_air_gap=DIRTY_AIR_GAP, dirty_air_penalty=DIRTY_AIR_PENALTY):
+    """Final gap (my option x rival option) after racing every pair of options lap by lap.
+
+    gap is my deficit at the start (positive means I am behind). The car behind
+    loses time in dirty air and cannot pass on track unless it is overtake_delta
+    faster on that lap; passes through the pit lane are never blocked. A positive
+    result means I finish behind.
+    """
+    gaps = np.full((len(my_lap_times), len(rival_lap_times)), float(gap))
+    for lap in range(my_lap_times.shape[1]):
+        my_lap = my_lap_times[:, lap][:, None]
+        rival_lap = rival_lap_times[:, lap][None, :]
+        closeness = np.clip(1 - np.abs(gaps) / dirty_air_gap, 0, 1) * dirty_air_penalty
+        # Only the car behind suffers in dirty air
+        new_gaps = gaps + my_lap - rival_lap + np.where(gaps > 0, closeness, -closeness)
+
+        pit_lane = my_pitting[:, lap][:, None] | rival_pitting[:, lap][None, :]
+        me_stuck = (gaps > 0) & (rival_lap - my_lap < overtake_delta) & ~pit_lane
+        rival_stuck = (gaps < 0) & (my_lap - rival_lap < overtake_delta) & ~pit_lane
+        new_gaps = np.where(me_stuck, np.maximum(new_gaps, min_follow_gap), new_gaps)
+        gaps = np.where(rival_stuck, np.minimum(new_gaps, -min_follow_gap), new_gaps)
+    return gaps
+
+
+def best_responses(surface, my_options, rival_options):
+    """My best option against each rival option, with the gap it leaves."""
+    best = np.argmin(surface, axis=0)
+    return pd.DataFrame({
+        'Rival Compound': rival_options['Compound'].to_numpy(),
+        'Rival Pit Lap': rival_options['Pit Lap'].to_numpy(),
+        'My Compound': my_options['Compound'].to_numpy()[best],
+        'My Pit Lap': my_options['Pit Lap'].to_numpy()[best],
+        'Final Gap (s)': surface[best, np.arange(surface.shape[1])]
+    })
+
+
+def solve_battle(engine, my_state, rival_state, current_lap, total_laps, pit_stop_time_loss, gap=0.0,
+                 my_pace=0.0, rival_pace=0.0, compounds=DRY_COMPOUNDS, **race_options):
+    """Best response, undercut and overcut windows for my car against one rival.
+
+    Both cars make one more stop. The recommended plan is the one whose worst case
+    over every rival reply is best (the rival is assumed to respond as well as it
+    can). The undercut window lists my pit laps that still leave me ahead if the
+    rival covers by pitting on the next lap. The overcut window lists rival pit laps
+    I can answer by staying out longer and still finish ahead.
+    """
+    my_options, my_lap_times, my_pitting = stop_options(engine, my_state, current_lap, total_laps, pit_stop_time_loss, my_pace, compounds)
+    rival_options, rival_lap_times, rival_pitting = stop_options(engine, rival_state, current_lap, total_laps, pit_stop_time_loss, rival_pace, compounds)
+    surface = response_surface(my_lap_times, my_pitting, rival_lap_times, rival_pitting, gap, **race_options)
+
+    worst_case = surface.max(axis=1)
+    robust = int(np.argmin(worst_case))
+    recommendation = {
+        'Compound': my_options['Compound'].iloc[robust],
+        'Pit Lap': int(my_options['Pit Lap'].iloc[robust]),
+        'Worst-Case Gap (s)': float(worst_case[robust])
+    }
+
+    # Undercut: rival covers one lap later with whichever compound suits them best
+    rival_pit_laps = rival_options['Pit Lap'].to_numpy()
+    undercut = []
+    for pit_lap in np.unique(my_options['Pit Lap']):
+        covering = rival_pit_laps == pit_lap + 1
+        if not covering.any():
+            continue
+        mine = my_options['Pit Lap'].to_numpy() == pit_lap
+        rows = surface[np.ix_(mine, covering)].max(axis=1)
+        if rows.min() < 0:
+            undercut.append({'My Pit Lap': int(pit_lap), 'My Compound': my_options['Compound'].to_numpy()[mine][np.argmin(rows)],
+                             'Final Gap (s)': float(rows.min())})
+
+    # Overcut: after the rival stops, I stay out at least one more lap and still finish ahead
+    overcut = []
+    my_pit_laps = my_options['Pit Lap'].to_numpy()
+    for pit_lap in np.unique(rival_pit_laps):
+        later = my_pit_laps > pit_lap
+        if not later.any():
+            continue
+        reply = surface[np.ix_(later, rival_pit_laps == pit_lap)].max(axis=1)
+        if reply.min() < 0:
+            best = np.flatnonzero(later)[np.argmin(reply)]
+            overcut.append({'Rival Pit Lap': int(pit_lap), 'My Pit Lap': int(my_pit_laps[best]),
+                            'My Compound': my_options['Compound'].iloc[best], 'Final Gap (s)': float(reply.min())})
+
+    return {
+        'surface': surface,
+        'my_options': my_options,
+        'rival_options': rival_options,
+        'recommendation': recommendation,
+        'best_responses': best_responses(surface, my_options, rival_options),
+        'undercut_window': pd.DataFrame(undercut, columns=['My Pit Lap', 'My Compound', 'Final Gap (s)']),
+        'overcut_window': pd.DataFrame(overcut, columns=['Rival Pit Lap', 'My Pit Lap', 'My Compound', 'Final Gap (s)'])
+    }
+
+
+def pit_lap_surface(battle):
+    """Gap by (my pit lap x rival pit lap), for plotting.
+
+    For each pair I pick my best compound, and the rival then replies with theirs.
+    """
+    surface, my_options, rival_options = battle['surface'], battle['my_options'], battle['rival_options']
+    my_pit_laps, rival_pit_laps = np.unique(my_options['Pit Lap']), np.unique(rival_options['Pit Lap'])
+    # Options are laid out compound-major, so the surface splits into (compound, pit lap) axes
+    grid = surface.reshape(-1, len(my_pit_laps), surface.shape[1] // len(rival_pit_laps), len(rival_pit_laps))
+    grid = grid.max(axis=2).min(axis=0)
+    return pd.DataFrame(grid, index=pd.Index(my_pit_laps, name='My Pit Lap'), columns=pd.Index(rival_pit_laps, name='Rival Pit Lap'))